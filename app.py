@@ -1,15 +1,12 @@
 import streamlit as st
 import os
+import uuid
+import importlib
 import config
 import data_processing
-from modules.stats_analysis import StatsAgent
-from modules.summary_agent import SummaryAgent
-from modules.advanced_analysis import AdvancedAnalysisAgent
-from modules.topic_modeling import TopicModelAgent
-from modules.ai_summary import GeminiSummaryAgent
+from modules.ai_summary import get_gemini_agent
 from visualization_helpers import render_metric_card, render_insight_box
-
-from pages import overview, time_series, text_analysis, advanced_topics, credibility, ai_insights
+from utils import render_tab_selector, wait_for_analyses
 
 st.set_page_config(
     page_title=config.APP_TITLE,
@@ -32,59 +29,71 @@ def main():
     col1, col2 = st.columns([2, 1])
     
     with col1:
-        uploaded_file = st.file_uploader("Upload JSONL Data", type=["jsonl", "json"])
+        uploaded_file = st.file_uploader("Upload JSONL Data", type=["jsonl", "json", "gz", "zst", "bz2"])
     
     with col2:
         st.write("")
         st.write("")
         use_demo_data = st.checkbox("Use Demo Data", value=uploaded_file is None)
+        follow_file = use_demo_data and uploaded_file is None and st.checkbox(
+            "Follow demo file for new posts", value=False
+        )
     
+    session_id = st.session_state.setdefault("session_id", uuid.uuid4().hex)
     if uploaded_file is not None or use_demo_data:
         with st.spinner("Processing data..."):
-            df, stats_agent = data_processing.load_data(uploaded_file, use_demo_data)
-            if df is None:
+            agents = data_processing.load_agents(uploaded_file, use_demo_data, follow=follow_file, session_id=session_id)
+            if agents is None:
                 st.error("Error loading data. Please check your file format.")
                 return
                 
-            advanced_agent = AdvancedAnalysisAgent(df)
-            topic_agent = TopicModelAgent(df)
-            gemini_agent = GeminiSummaryAgent()
-            summary_agent = SummaryAgent(df, stats_agent, topic_agent)
+            df = agents["df"]
+            stats_agent = agents["stats_agent"]
+            advanced_agent = agents["advanced_agent"]
+            topic_agent = agents["topic_agent"]
+            summary_agent = agents["summary_agent"]
+            scheduler = agents["scheduler"]
+            gemini_agent = get_gemini_agent()
             
-            st.success(f"Loaded {len(df):,} Reddit posts from {'demo data' if use_demo_data else 'uploaded file'}")
+            total_posts = stats_agent.get_post_count()
+            st.success(f"Loaded {total_posts:,} Reddit posts from {'demo data' if use_demo_data else 'uploaded file'}")
+            if total_posts > len(df):
+                st.info(f"Post counts and activity charts cover all {total_posts:,} posts; text, topic, sentiment "
+                        f"and credibility views run on a sample of {len(df):,} posts.")
+
+        with st.expander("Dataset memory usage"):
+            usage = data_processing.dataset_store.memory_usage()
+            st.caption(f"Process RSS: {data_processing.current_rss() / 1e6:,.0f} MB")
+            st.dataframe(usage, use_container_width=True)
             
-            overview_tab, time_series_tab, text_analysis_tab, advanced_topics_tab, credibility_tab, ai_insights_tab = st.tabs([
-                "📈 Overview & Stats", 
-                "⏱️ Time Series Analysis", 
-                "🔤 Text Analysis",
-                "🔍 Advanced Topics",
-                "🛡️ Credibility Analysis",
-                "🤖 AI Insights"
-            ])
+        active_tab = render_tab_selector()
+        wait_for_analyses(scheduler, data_processing.VIEW_ANALYSES[active_tab])
+        page = importlib.import_module(f"pages.{active_tab}")
+        
+        if active_tab == "overview":
+            page.render(df, stats_agent, advanced_agent)
             
-            with overview_tab:
-                overview.render(df, stats_agent, advanced_agent)
-                
-            with time_series_tab:
-                time_series.render(df, stats_agent)
-                
-            with text_analysis_tab:
-                text_analysis.render(df, stats_agent)
-                
-            with advanced_topics_tab:
-                advanced_topics.render(df, advanced_agent, gemini_agent)
-                
-            with credibility_tab:
-                credibility.render(df, advanced_agent)
-                
-            with ai_insights_tab:
-                ai_insights.render(df, stats_agent, advanced_agent, gemini_agent, summary_agent)
+        elif active_tab == "time_series":
+            page.render(df, stats_agent)
+            
+        elif active_tab == "text_analysis":
+            page.render(df, stats_agent, topic_agent)
+            
+        elif active_tab == "advanced_topics":
+            page.render(df, advanced_agent, gemini_agent, agents["key"])
+            
+        elif active_tab == "credibility":
+            page.render(df, advanced_agent)
+            
+        elif active_tab == "ai_insights":
+            page.render(df, stats_agent, advanced_agent, gemini_agent, summary_agent, agents["key"])
     else:
+        data_processing.dataset_store.release(session_id)
         st.info("Please upload a JSONL file containing Reddit data to begin analysis.")
         st.markdown("""
         ## Expected Data Format
         
-        The JSONL file should contain Reddit posts with one JSON object per line:
+        The JSONL file should contain Reddit posts with one JSON object per line. Files compressed with gzip, zstd or bzip2 are also accepted:
         ```
         {"kind": "t3", "data": {"subreddit": "...", "title": "...", "selftext": "...", "score": 123, ...}}
         {"kind": "t3", "data": {"subreddit": "...", "title": "...", "selftext": "...", "score": 123, ...}}
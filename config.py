@@ -4,9 +4,16 @@ from dotenv import load_dotenv
 load_dotenv()
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_STATUS_TTL = int(os.getenv("GEMINI_STATUS_TTL", 600))
+GEMINI_SUMMARY_CACHE_ENTRIES = int(os.getenv("GEMINI_SUMMARY_CACHE_ENTRIES", 256))
 
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(PROJECT_ROOT, "data")
+NLTK_DATA_DIR = os.getenv("NLTK_DATA_DIR", os.path.join(PROJECT_ROOT, "nltk_data"))
+LEXICON_DIR = os.getenv("LEXICON_DIR", os.path.join(PROJECT_ROOT, "lexicons"))
+PUBLIC_SUFFIX_LIST_PATH = os.getenv("PUBLIC_SUFFIX_LIST_PATH", os.path.join(PROJECT_ROOT, "lexicons", "public_suffix_list.dat"))
+DOMAIN_CACHE_MAX_HOSTS = 1_000_000
+IMPORT_TIME_BUDGET = float(os.getenv("IMPORT_TIME_BUDGET", 1.5))
 DEMO_DATA_PATH = os.path.join(DATA_DIR, "demo_reddit_data.jsonl")
 APP_TITLE = "Reddit Data Analyzer"
 APP_ICON = "📊"
@@ -20,18 +27,32 @@ DEMO_DATA_PATH = "data/data.jsonl"
 DEFAULT_TOPICS = 5
 MAX_TOPICS = 10
 
-TRUSTED_DOMAINS = [
-    "nature.com", "science.org", "nih.gov", "nasa.gov", "edu", 
-    "bbc.com", "reuters.com", "apnews.com", "who.int", "cdc.gov",
-    "nytimes.com", "washingtonpost.com", "theguardian.com", 
-    "scientificamerican.com", "smithsonianmag.com"
-]
-
-UNTRUSTED_DOMAINS = [
-    "infowars.com", "naturalnews.com", "breitbart.com", 
-    "dailywire.com", "beforeitsnews.com", "bitchute.com",
-    "rumble.com", "parler.com", "gab.com", "gettr.com",
-    "4chan.org", "thedcpatriot.com", "thegatewaypundit.com"
-]
+INGEST_CHUNK_SIZE = 8 * 1024 * 1024
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", 0)) or None
+PARALLEL_INGEST_MIN_BYTES = 256 * 1024 * 1024
+INGEST_DEDUP = os.getenv("INGEST_DEDUP", "exact")
+DEDUP_BLOOM_CAPACITY = 10_000_000
+DEDUP_BLOOM_ERROR_RATE = 0.001
+
+DATASET_CACHE_DIR = os.path.join(DATA_DIR, "cache")
+DATASET_CACHE_MAX_BYTES = int(os.getenv("DATASET_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+CREDIBILITY_CACHE_PATH = os.getenv("CREDIBILITY_CACHE_PATH", os.path.join(DATASET_CACHE_DIR, "credibility.sqlite"))
+CREDIBILITY_CACHE_MAX_ROWS = int(os.getenv("CREDIBILITY_CACHE_MAX_ROWS", 20_000_000))
+
+SCHEDULER_WORKERS = int(os.getenv("SCHEDULER_WORKERS", 4))
+CREDIBILITY_WORKERS = int(os.getenv("CREDIBILITY_WORKERS", 0)) or None
+CREDIBILITY_CHUNK_ROWS = int(os.getenv("CREDIBILITY_CHUNK_ROWS", 50_000))
+CREDIBILITY_JITTER = os.getenv("CREDIBILITY_JITTER", "hash")
+SENTIMENT_WORKERS = int(os.getenv("SENTIMENT_WORKERS", 0)) or None
+SENTIMENT_CHUNK_ROWS = int(os.getenv("SENTIMENT_CHUNK_ROWS", 50_000))
+SENTIMENT_MEMO_MAX_ROWS = int(os.getenv("SENTIMENT_MEMO_MAX_ROWS", 5_000_000))
+AGENT_CACHE_MAX_BYTES = int(os.getenv("AGENT_CACHE_MAX_BYTES", 4 * 1024 ** 3))
+DATASET_RSS_BUDGET_BYTES = int(os.getenv("DATASET_RSS_BUDGET_BYTES", 8 * 1024 ** 3))
+DATASET_LEASE_SECONDS = 3600
+
+OUT_OF_CORE_DIR = os.path.join(DATA_DIR, "store")
+OUT_OF_CORE_MIN_BYTES = int(os.getenv("OUT_OF_CORE_MIN_BYTES", 4 * 1024 ** 3))
+OUT_OF_CORE_SAMPLE_ROWS = 200_000
+OUT_OF_CORE_MEMORY_LIMIT = os.getenv("OUT_OF_CORE_MEMORY_LIMIT", "4GB")
 
 os.makedirs(DATA_DIR, exist_ok=True)
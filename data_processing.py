@@ -3,61 +3,357 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import os
+import gzip
+import threading
+import weakref
 from modules.data_ingestion import DataIngestionAgent
+from modules.dataset_cache import DatasetCache
+from modules.columnar_store import ColumnarStore
+from modules.agent_cache import AgentCache
+from modules.dataset_store import DatasetStore, current_rss
+from modules.scheduler import AnalysisScheduler
+from modules.derived_columns import features_for
+from modules.domain_reputation import DOMAIN_LIST_FILES, read_domain_list
 import config
 
-def load_data(uploaded_file=None, use_demo_data=False):
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+dataset_cache = DatasetCache()
+agent_cache = AgentCache(on_evict=lambda agents: "scheduler" in agents and agents["scheduler"].shutdown())
+dataset_store = DatasetStore(on_evict=agent_cache.discard)
+followed_files = {}
+followed_files_lock = threading.Lock()
+fingerprints = {}
+
+def load_agents(uploaded_file=None, use_demo_data=False, follow=False, out_of_core=None, session_id=None):
+    following = follow and uploaded_file is None and use_demo_data and os.path.exists(config.DEMO_DATA_PATH)
+    if uploaded_file is not None:
+        key = dataset_key(uploaded_file)
+    elif following:
+        key = follow_key(config.DEMO_DATA_PATH)
+    elif use_demo_data and os.path.exists(config.DEMO_DATA_PATH) and _use_store(config.DEMO_DATA_PATH, out_of_core):
+        # Out-of-core archives are keyed by stat like the store itself; hashing them would read every byte.
+        key = f"store:{ColumnarStore.store_key(config.DEMO_DATA_PATH, config.INGEST_DEDUP)}"
+    elif use_demo_data and os.path.exists(config.DEMO_DATA_PATH):
+        key = dataset_key(config.DEMO_DATA_PATH)
+    elif use_demo_data:
+        key = "synthetic"
+    else:
+        if session_id is not None:
+            dataset_store.release(session_id)
+        return None
+
+    if session_id is not None:
+        dataset_store.hold(session_id, key)
+    if following and key in agent_cache:
+        follow_file(config.DEMO_DATA_PATH)
+    return agent_cache.get_or_create(
+        key, lambda: _build_agents(uploaded_file, use_demo_data, following, out_of_core, key)
+    )
+
+def _build_agents(uploaded_file, use_demo_data, follow, out_of_core, key):
+    from modules.advanced_analysis import AdvancedAnalysisAgent
+    from modules.topic_modeling import TopicModelAgent
+    from modules.summary_agent import SummaryAgent
+
+    df, stats_agent = load_data(uploaded_file, use_demo_data, follow, out_of_core, key=key)
+    advanced_agent = AdvancedAnalysisAgent(df)
+    topic_agent = TopicModelAgent(df)
+    summary_agent = SummaryAgent(df, stats_agent, topic_agent)
+    agents = {
+        "key": key,
+        "df": df,
+        "stats_agent": stats_agent,
+        "advanced_agent": advanced_agent,
+        "topic_agent": topic_agent,
+        "summary_agent": summary_agent,
+        "scheduler": AnalysisScheduler()
+    }
+    schedule_analyses(agents)
+
+    if follow:
+        ingestion_agent = followed_files[config.DEMO_DATA_PATH]
+        ingestion_agent.listeners.clear()
+        ingestion_agent.add_listener(lambda df, new_rows: agents.update(df=df))
+        ingestion_agent.add_listener(lambda df, new_rows: dataset_store.put(key, df))
+        for agent in (stats_agent, advanced_agent, topic_agent, summary_agent):
+            ingestion_agent.add_listener(agent.on_new_rows)
+        ingestion_agent.add_listener(lambda df, new_rows: schedule_analyses(agents))
+    return agents
+
+def subreddit_agent(dataset_key, agent, subreddit):
+    # Shared across sessions and reruns, so each subreddit is filtered and analysed once per dataset.
+    key = (dataset_key, type(agent).__name__, subreddit)
+    entry = agent_cache.get(key)
+    if entry is not None and entry["source"]() is not agent.df:
+        agent_cache.discard(key)
+    return agent_cache.get_or_create(key, lambda: _build_subreddit_agent(agent, subreddit))["agent"]
+
+def _build_subreddit_agent(agent, subreddit):
+    df = agent.df[agent.df['subreddit'] == subreddit]
+    return {"df": df, "agent": type(agent)(df), "source": weakref.ref(agent.df)}
+
+VIEW_ANALYSES = {
+    "overview": ["rollups"],
+    "time_series": ["rollups", "sentiment"],
+    "text_analysis": ["wordcloud", "lda_topics"],
+    "advanced_topics": ["simple_topics", "trends"],
+    "credibility": ["credibility"],
+    "ai_insights": ["summary", "nmf_topics", "credibility"]
+}
+
+def schedule_analyses(agents):
+    scheduler = agents["scheduler"]
+    stats_agent = agents["stats_agent"]
+    advanced_agent = agents["advanced_agent"]
+    topic_agent = agents["topic_agent"]
+    summary_agent = agents["summary_agent"]
+
+    def rollups():
+        stats_agent.get_subreddit_distribution()
+        stats_agent.get_posts_over_time()
+        stats_agent.get_posts_by_day_of_week()
+        stats_agent.get_posts_by_hour()
+
+    def wordcloud():
+        stats_agent.generate_title_wordcloud()
+        stats_agent.get_top_keywords_in_titles(n=5)
+        stats_agent.get_top_keywords_in_titles(n=20)
+
+    scheduler.submit("tokens", lambda: features_for(advanced_agent.df)["title_keywords"])
+    scheduler.submit("text", lambda: features_for(advanced_agent.df)["combined_text"])
+    scheduler.submit("sentiment", lambda: features_for(advanced_agent.df)["sentiment_compound"])
+    scheduler.submit("credibility", advanced_agent.score_credibility, depends_on=["sentiment"])
+    scheduler.submit("rollups", rollups)
+    scheduler.submit("wordcloud", wordcloud)
+    scheduler.submit("network", advanced_agent.generate_network_graph)
+    scheduler.submit("trends", lambda: advanced_agent.detect_trends(time_window="W", min_count=5), depends_on=["tokens"])
+    scheduler.submit("tfidf", advanced_agent._tfidf_matrix, depends_on=["text"])
+    scheduler.submit("simple_topics", lambda: advanced_agent._generate_simple_topics(n_topics=5), depends_on=["tfidf"])
+    scheduler.submit("nmf_topics", lambda: advanced_agent.generate_topics(n_topics=5), depends_on=["tfidf"])
+    scheduler.submit("lda_topics", lambda: topic_agent.generate_topics(n_topics=config.DEFAULT_TOPICS), depends_on=["text"])
+    scheduler.submit("summary", summary_agent.generate_summary, depends_on=["rollups"])
+
+def dataset_key(source):
+    settings = ingest_settings()
+    if isinstance(source, str):
+        stat = os.stat(source)
+        memo_key = (os.path.abspath(source), stat.st_size, stat.st_mtime_ns, settings)
+    elif getattr(source, "file_id", None) is not None:
+        memo_key = ("upload", source.file_id, settings)
+    else:
+        return DatasetCache.fingerprint(source, settings)
+
+    if memo_key not in fingerprints:
+        fingerprints[memo_key] = DatasetCache.fingerprint(source, settings)
+    return fingerprints[memo_key]
+
+def ingest_settings():
+    return (config.INGEST_DEDUP, tuple(DataIngestionAgent.FIELDS))
+
+def load_data(uploaded_file=None, use_demo_data=False, follow=False, out_of_core=None, key=None):
     from modules.stats_analysis import StatsAgent
     
+    store = None
     if uploaded_file is not None:
-        ingestion_agent = DataIngestionAgent(uploaded_file)
-        df = ingestion_agent.get_dataframe()
+        df = _load_cached(uploaded_file, key)
     
     elif use_demo_data:
-        if os.path.exists(config.DEMO_DATA_PATH):
-            ingestion_agent = DataIngestionAgent(config.DEMO_DATA_PATH)
-            df = ingestion_agent.get_dataframe()
+        if os.path.exists(config.DEMO_DATA_PATH) and follow:
+            df = dataset_store.put(key or follow_key(config.DEMO_DATA_PATH),
+                                   follow_file(config.DEMO_DATA_PATH).get_dataframe())
+        elif os.path.exists(config.DEMO_DATA_PATH) and _use_store(config.DEMO_DATA_PATH, out_of_core):
+            store = ColumnarStore.for_file(config.DEMO_DATA_PATH, dedup=config.INGEST_DEDUP)
+            df = dataset_store.get_or_load(key or dataset_key(config.DEMO_DATA_PATH), store.sample)
+        elif os.path.exists(config.DEMO_DATA_PATH):
+            df = _load_cached(config.DEMO_DATA_PATH, key)
         else:
-            df = generate_synthetic_data()
+            df = dataset_store.get_or_load(key or "synthetic", generate_synthetic_data)
     else:
         return None, None
-    stats_agent = StatsAgent(df)
+    stats_agent = StatsAgent(df, store=store)
     
     return df, stats_agent
 
-def generate_synthetic_data():
-    synthetic_data = []
-    base_date = datetime.now() - timedelta(days=30)
-    
-    subreddits = ["WorldNews", "Technology", "Science", "Gaming", "Politics"]
-    topics = ["AI", "Climate", "Elections", "Space", "Economy"]
-    
-    for i in range(100):
-        created_date = base_date + timedelta(
-            days=np.random.randint(0, 30),
-            hours=np.random.randint(0, 24)
-        )
-        
-        subreddit = np.random.choice(subreddits)
-        topic = np.random.choice(topics)
-        score = int(np.random.normal(50, 30))
-        
-        synthetic_data.append({
-            "subreddit": subreddit,
-            "title": f"Discussion about {topic} impact on society",
-            "selftext": f"This is a synthetic post about {topic} for demo purposes.",
-            "author": f"demo_user_{np.random.randint(1, 11)}",
-            "score": score,
-            "created_utc": created_date.timestamp()
-        })
-    df = pd.DataFrame(synthetic_data)
+def _use_store(path, out_of_core):
+    if out_of_core is None:
+        return os.path.getsize(path) >= config.OUT_OF_CORE_MIN_BYTES
+    return out_of_core
+
+def _load_cached(source, key=None):
+    key = key or DatasetCache.fingerprint(source, ingest_settings())
+    return dataset_store.get_or_load(key, lambda: _read_cached(source, key))
+
+def _read_cached(source, key):
+    df = dataset_cache.load(key)
+    if df is None:
+        ingestion_agent = DataIngestionAgent(source, dedup=config.INGEST_DEDUP)
+        df = ingestion_agent.get_dataframe()
+        dataset_cache.store(key, df)
+    return df
+
+def follow_key(path):
+    return f"follow:{os.path.abspath(path)}"
+
+def follow_file(path):
+    with followed_files_lock:
+        ingestion_agent = followed_files.get(path)
+        if ingestion_agent is None:
+            ingestion_agent = DataIngestionAgent(path, follow=True)
+            followed_files[path] = ingestion_agent
+            return ingestion_agent
+    ingestion_agent.read_new_rows()
+    return ingestion_agent
+
+SYNTHETIC_SUBREDDITS = ["WorldNews", "Technology", "Science", "Gaming", "Politics"]
+SYNTHETIC_TOPICS = ["AI", "Climate", "Elections", "Space", "Economy", "Healthcare",
+                    "Crypto", "Energy", "Education", "Housing"]
+SYNTHETIC_TITLES = [
+    "Discussion about {topic} impact on society",
+    "New report on {topic} raises questions",
+    "What do you think about the latest {topic} news?",
+    "{topic} update: experts weigh in",
+    "Why {topic} matters more than ever",
+    "BREAKING: major {topic} announcement!!",
+]
+SYNTHETIC_TEXTS = [
+    "This is a synthetic post about {topic} for demo purposes.",
+    "According to a recent study, {topic} is changing faster than expected.",
+    "Some argue {topic} is overhyped; however, the data indicates otherwise.",
+    "",
+]
+SYNTHETIC_LINK_DOMAINS = 20
+HOURLY_ACTIVITY = np.array([3, 2, 1.5, 1, 1, 1.5, 3, 5, 6, 6, 5.5, 5.5,
+                            6, 6, 5.5, 5.5, 6, 7, 8, 8.5, 8, 7, 5.5, 4])
+WEEKDAY_ACTIVITY = np.array([1.1, 1.15, 1.1, 1.05, 1.0, 0.8, 0.8])
+
+def _zipf_weights(n, exponent):
+    return 1.0 / np.arange(1, n + 1) ** exponent
+
+def _sample(rng, weights, size):
+    cumulative = np.cumsum(weights)
+    return np.searchsorted(cumulative, rng.random(size) * cumulative[-1], side='right')
+
+def _render_table(templates):
+    return [tpl.format(topic=topic) for tpl in templates for topic in SYNTHETIC_TOPICS]
+
+def _strings_from_table(table, codes):
+    if pyarrow is None:
+        return pd.Series(np.array(table, dtype=object)[codes])
+    values = pyarrow.DictionaryArray.from_arrays(pyarrow.array(codes.astype(np.int32)), pyarrow.array(table))
+    return pd.Series(pd.arrays.ArrowStringArray(values.cast(pyarrow.string())))
+
+def _integer_strings(n):
+    if pyarrow is None:
+        return pd.Series(np.arange(n)).astype(str)
+    return pd.Series(pd.arrays.ArrowStringArray(pyarrow.array(np.arange(n)).cast(pyarrow.string())))
+
+def generate_synthetic_data(n_posts=100, n_subreddits=None, n_authors=None, days=30,
+                            popularity_exponent=1.1, score_alpha=1.5, n_bursts=3,
+                            burst_share=0.6, url_share=0.3, untrusted_share=0.3, seed=None):
+    rng = np.random.default_rng(seed)
+    n_subreddits = n_subreddits or len(SYNTHETIC_SUBREDDITS)
+    n_authors = n_authors or max(10, n_posts // 20)
+    n_topics = len(SYNTHETIC_TOPICS)
+
+    subreddits = (SYNTHETIC_SUBREDDITS + [f"Community{i}" for i in range(len(SYNTHETIC_SUBREDDITS), n_subreddits)])[:n_subreddits]
+    subreddit_codes = _sample(rng, _zipf_weights(n_subreddits, popularity_exponent), n_posts)
+    author_codes = _sample(rng, _zipf_weights(n_authors, popularity_exponent), n_posts)
+
+    start = int((datetime.now() - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0).timestamp())
+    start_weekday = datetime.fromtimestamp(start).weekday()
+    day_weights = WEEKDAY_ACTIVITY[(np.arange(days) + start_weekday) % 7]
+    day_offsets = _sample(rng, day_weights, n_posts)
+    hours = _sample(rng, HOURLY_ACTIVITY, n_posts)
+    created_utc = start + day_offsets * 86400 + hours * 3600 + rng.integers(0, 3600, size=n_posts)
+
+    topic_codes = rng.integers(0, n_topics, size=n_posts)
+    for _ in range(n_bursts):
+        center = rng.integers(0, days)
+        width = rng.integers(1, 4)
+        in_burst = (np.abs(day_offsets - center) <= width) & (rng.random(n_posts) < burst_share)
+        topic_codes[in_burst] = rng.integers(0, n_topics)
+
+    trusted_domains, untrusted_domains = [
+        read_domain_list(os.path.join(config.LEXICON_DIR, DOMAIN_LIST_FILES[group]))[:SYNTHETIC_LINK_DOMAINS]
+        for group in ('trusted', 'untrusted')
+    ]
+    link_domains = [d if '.' in d else f"example.{d}" for d in trusted_domains + untrusted_domains]
+    link_urls = [f"https://www.{d}/article" for d in link_domains]
+    n_trusted = len(trusted_domains)
+    has_link = rng.random(n_posts) < url_share
+    untrusted = rng.random(n_posts) < untrusted_share
+    domain_codes = np.where(
+        untrusted,
+        rng.integers(n_trusted, len(link_domains), size=n_posts),
+        rng.integers(0, n_trusted, size=n_posts)
+    )
+
+    title_table = _render_table(SYNTHETIC_TITLES)
+    titles = _strings_from_table(title_table, rng.integers(0, len(SYNTHETIC_TITLES), size=n_posts) * n_topics + topic_codes)
+
+    text_table = _render_table(SYNTHETIC_TEXTS)
+    linked_table = [f"{text} {url}".strip() for text in text_table for url in link_urls]
+    text_codes = rng.integers(0, len(SYNTHETIC_TEXTS), size=n_posts) * n_topics + topic_codes
+    linked_codes = len(text_table) + text_codes * len(link_urls) + domain_codes
+    selftexts = _strings_from_table(text_table + linked_table, np.where(has_link, linked_codes, text_codes))
+
+    urls = np.array(link_urls, dtype=object)[domain_codes]
+    domain_codes = np.where(has_link, domain_codes, len(link_domains) + subreddit_codes)
+
+    scores = np.floor(rng.pareto(score_alpha, size=n_posts) * 10).astype(np.int32) - rng.integers(0, 5, size=n_posts, dtype=np.int32)
+    ids = _integer_strings(n_posts)
+
+    df = pd.DataFrame({
+        "id": ids,
+        "name": "t3_" + ids,
+        "subreddit": pd.Categorical.from_codes(subreddit_codes, subreddits),
+        "title": titles,
+        "selftext": selftexts,
+        "author": pd.Categorical.from_codes(author_codes, [f"demo_user_{i + 1}" for i in range(n_authors)]),
+        "score": scores,
+        "created_utc": created_utc,
+        "retrieved_on": created_utc + rng.integers(3600, 86400, size=n_posts),
+        "url": np.where(has_link, urls, None),
+        "domain": pd.Categorical.from_codes(domain_codes, link_domains + [f"self.{s}" for s in subreddits]),
+        "num_comments": np.floor(rng.pareto(score_alpha, size=n_posts) * 3).astype(np.int32),
+    })
     
     df['created_date'] = pd.to_datetime(df['created_utc'], unit='s')
-    df['date'] = df['created_date'].dt.date
-    df['year'] = df['created_date'].dt.year
-    df['month'] = df['created_date'].dt.month
-    df['day'] = df['created_date'].dt.day
-    df['day_of_week'] = df['created_date'].dt.dayofweek
-    df['hour'] = df['created_date'].dt.hour
     
     return df
+
+def write_synthetic_data(df, path, chunk_size=500_000):
+    if path.endswith('.parquet'):
+        df.drop(columns=['created_date']).to_parquet(path, index=False)
+        return
+
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'wt', encoding='utf-8') as f:
+        for start in range(0, len(df), chunk_size):
+            chunk = df.iloc[start:start + chunk_size].drop(columns=['created_date'])
+            records = chunk.to_json(orient='records', lines=True).splitlines()
+            f.write(''.join(f'{{"kind":"t3","data":{record}}}\n' for record in records))
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Generate synthetic Reddit posts for load testing")
+    parser.add_argument("output", help="Destination .jsonl, .jsonl.gz or .parquet file")
+    parser.add_argument("--posts", type=int, default=1_000_000)
+    parser.add_argument("--subreddits", type=int, default=50)
+    parser.add_argument("--authors", type=int, default=None)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    df = generate_synthetic_data(args.posts, n_subreddits=args.subreddits, n_authors=args.authors,
+                                 days=args.days, seed=args.seed)
+    generated = time.perf_counter()
+    write_synthetic_data(df, args.output)
+    print(f"Generated {len(df):,} posts in {generated - started:.1f}s, wrote {args.output} in {time.perf_counter() - generated:.1f}s")
@@ -1,15 +1,6 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 from collections import Counter
-import networkx as nx
-import plotly.express as px
-import plotly.graph_objects as go
-from wordcloud import WordCloud
-import nltk
-import requests
 from datetime import datetime, timedelta
 import re
 import os
@@ -18,38 +9,28 @@ import traceback
 from typing import Dict, List, Tuple, Union, Optional
 from urllib.parse import urlparse
 from modules.credibility_analyzer import CredibilityAnalyzer
+from modules.credibility_factors import decode_factors, factor_counts
+from modules.derived_columns import features_for
+from modules.agent_cache import memoized, clear_results
 
 logger = logging.getLogger(__name__)
 
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt', quiet=True)
-
 class AdvancedAnalysisAgent:
+
+    CREDIBILITY_DISPLAY_COLUMNS = ['title', 'subreddit']
+
     def __init__(self, df: pd.DataFrame):
         
         self.df = df
-        self._prepare_text_data()
         self.credibility_analyzer = CredibilityAnalyzer()
-        
-    def _prepare_text_data(self) -> None:
-        if 'selftext' in self.df.columns:
-            self.df['combined_text'] = self.df['title'] + ' ' + self.df['selftext'].fillna('')
-        else:
-            self.df['combined_text'] = self.df['title']
-            
-        self.df['combined_text'] = self.df['combined_text'].astype(str)
-        self.df['title'] = self.df['title'].astype(str)
-        
-        self.df['urls'] = self.df['combined_text'].apply(self._extract_urls)
     
-    def _extract_urls(self, text: str) -> List[str]:
-        url_pattern = r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'
-        return re.findall(url_pattern, text)
-    def _generate_simple_topics(self, n_topics: int = 5) -> Dict:
-
-        from sklearn.decomposition import NMF
+    def on_new_rows(self, df: pd.DataFrame, new_rows: pd.DataFrame) -> None:
+        self.df = df
+        clear_results(self)
+    
+    @memoized
+    def _tfidf_matrix(self):
+        from sklearn.feature_extraction.text import TfidfVectorizer
         
         vectorizer = TfidfVectorizer(
             max_features=1000,
@@ -58,9 +39,16 @@ class AdvancedAnalysisAgent:
             min_df=10
         )
         
+        tfidf = vectorizer.fit_transform(features_for(self.df)['combined_text'])
+        return tfidf, vectorizer.get_feature_names_out()
+    
+    @memoized
+    def _generate_simple_topics(self, n_topics: int = 5) -> Dict:
+
+        from sklearn.decomposition import NMF
+        
         try:
-            tfidf = vectorizer.fit_transform(self.df['combined_text'])
-            feature_names = vectorizer.get_feature_names_out()
+            tfidf, feature_names = self._tfidf_matrix()
             
             nmf = NMF(n_components=n_topics, random_state=42)
             nmf_results = nmf.fit_transform(tfidf)
@@ -71,11 +59,11 @@ class AdvancedAnalysisAgent:
                 top_words = [feature_names[i] for i in top_words_idx]
                 topic_terms[topic_idx] = top_words
             
-            self.df['topic_id'] = nmf_results.argmax(axis=1)
+            topic_ids = nmf_results.argmax(axis=1)
             
             topic_docs = {}
             for topic_id in range(n_topics):
-                docs = self.df[self.df['topic_id'] == topic_id]['title'].head(3).tolist()
+                docs = self.df['title'][topic_ids == topic_id].head(3).tolist()
                 topic_docs[topic_id] = docs
             
             return {
@@ -86,92 +74,55 @@ class AdvancedAnalysisAgent:
         except Exception as e:
             return {"error": f"Topic modeling failed: {str(e)}"}
     
+    @memoized
+    def _keyword_counts(self, time_window: str) -> Tuple[List[str], pd.DataFrame]:
+        title_keywords = features_for(self.df)['title_keywords']
+        period_index = self.df['created_date'].dt.to_period(time_window)
+        periods = [str(period) for period in sorted(period_index.dropna().unique())]
+        
+        keywords_per_post = title_keywords.str.len().fillna(0).astype(int).to_numpy()
+        exploded = pd.DataFrame({
+            'period': np.repeat(period_index.astype(str).to_numpy(), keywords_per_post),
+            'word': [word for keywords in title_keywords for word in keywords]
+        })
+        counts = exploded.groupby(['period', 'word'], sort=False).size().reset_index(name='count')
+        counts['position'] = counts['period'].map({period: i for i, period in enumerate(periods)})
+        return periods, counts
+    
+    @memoized
     def detect_trends(self, time_window: str = 'D', min_count: int = 5) -> Dict:
 
         if 'created_date' not in self.df.columns:
             return {"error": "Timestamp data not available for trend detection"}
         
         try:
-            # Extract and tokenize important words from titles
-            from nltk.tokenize import word_tokenize
-            from nltk.corpus import stopwords
-            stop_words = set(stopwords.words('english'))
-            
-            def extract_keywords(text):
-               
-                tokens = word_tokenize(text.lower())
-               
-                keywords = [word for word in tokens 
-                          if len(word) > 3 
-                          and word.isalpha()
-                          and word not in stop_words]
-                return keywords
-            
-            
-            self.df['keywords'] = self.df['title'].apply(extract_keywords)
-            
-            self.df['period'] = self.df['created_date'].dt.to_period(time_window)
-            
-            keyword_trends = {}
-            periods = sorted(self.df['period'].unique())
-            
-            for period in periods:
-                period_df = self.df[self.df['period'] == period]
-                all_keywords = [word for keywords in period_df['keywords'] for word in keywords]
-                keyword_counts = Counter(all_keywords)
-                keyword_trends[period] = keyword_counts
-            
-            trending_words = []
-            for i in range(1, len(periods)):
-                prev_period = periods[i-1]
-                curr_period = periods[i]
-                prev_counts = keyword_trends[prev_period]
-                curr_counts = keyword_trends[curr_period]
-                for word, count in curr_counts.items():
-                    if count >= min_count:
-                        prev_count = prev_counts.get(word, 0)
-                        if prev_count > 0:
-                            increase_ratio = count / prev_count
-                            if increase_ratio > 1.5:  # 50% increase threshold
-                                trending_words.append({
-                                    'word': word,
-                                    'period': str(curr_period),
-                                    'count': count,
-                                    'increase_ratio': increase_ratio
-                                })
-                        else:
-                            trending_words.append({
-                                'word': word,
-                                'period': str(curr_period),
-                                'count': count,
-                                'increase_ratio': float('inf')
-                            })
-            
-            trending_df = pd.DataFrame(trending_words)
+            periods, counts = self._keyword_counts(time_window)
+            
+            previous = counts[['position', 'word', 'count']].assign(position=counts['position'] + 1)
+            candidates = counts[(counts['position'] > 0) & (counts['count'] >= min_count)]
+            candidates = candidates.merge(previous, on=['position', 'word'], how='left', suffixes=('', '_prev'))
+            prev_count = candidates['count_prev'].fillna(0)
+            increase_ratio = np.where(prev_count > 0, candidates['count'] / prev_count.where(prev_count > 0, 1), np.inf)
+            trending = (prev_count == 0) | (increase_ratio > 1.5)  # 50% increase threshold
+            
+            trending_df = candidates.loc[trending, ['word', 'period', 'count']].assign(increase_ratio=increase_ratio[trending.to_numpy()])
+            trending_df = trending_df.reset_index(drop=True)
             if not trending_df.empty:
                 trending_df = trending_df.sort_values('increase_ratio', ascending=False)
+            else:
+                trending_df = pd.DataFrame()
             
-            trend_viz_data = []
             top_keywords = set()
             if not trending_df.empty:
                 top_keywords = set(trending_df.head(10)['word'])
             if len(top_keywords) < 5:
-                all_keywords = [word for keywords in self.df['keywords'] for word in keywords]
-                top_overall = [word for word, _ in Counter(all_keywords).most_common(10)]
+                top_overall = counts.groupby('word', sort=False)['count'].sum().nlargest(10).index
                 top_keywords.update(top_overall)
                 top_keywords = set(list(top_keywords)[:10])
             
-            for period in periods:
-                period_str = str(period)
-                counts = keyword_trends[period]
-                for keyword in top_keywords:
-                    trend_viz_data.append({
-                        'period': period_str,
-                        'keyword': keyword,
-                        'count': counts.get(keyword, 0)
-                    })
-            
-            trend_timeseries = pd.DataFrame(trend_viz_data)
+            keyword_counts = counts[counts['word'].isin(top_keywords)].set_index(['period', 'word'])['count']
+            grid = pd.MultiIndex.from_product([periods, list(top_keywords)], names=['period', 'keyword'])
+            trend_timeseries = keyword_counts.reindex(grid, fill_value=0).reset_index(name='count')
             
             return {
                 "trending_keywords": trending_df,
@@ -183,24 +134,47 @@ class AdvancedAnalysisAgent:
             return {"error": f"Error in trend detection: {str(e)}"}
     
     def score_credibility(self) -> pd.DataFrame:
+        try:
+            self.credibility_analyzer.reload_lexicons()
+        except ValueError as e:
+            logger.warning(f"Keeping previous credibility lexicons: {str(e)}")
+        return self._score_credibility(self.credibility_analyzer.lexicon_version)[0]
+    
+    def explain_credibility(self, posts: pd.DataFrame) -> pd.Series:
+        details = self._score_credibility(self.credibility_analyzer.lexicon_version)[1]
+        return decode_factors(posts['credibility_flags'], details)
+    
+    def credibility_factor_breakdown(self, by: str = 'subreddit') -> pd.DataFrame:
+        credibility_df = self.score_credibility()
+        if 'error' in credibility_df.columns or by not in self.df.columns:
+            return pd.DataFrame()
+        return factor_counts(credibility_df['credibility_flags'], self.df[by])
+    
+    @memoized
+    def _score_credibility(self, lexicon_version: int) -> Tuple[pd.DataFrame, pd.DataFrame]:
 
         try:
             logger.info("Analyzing content credibility...")
-            result_df = self.credibility_analyzer.batch_analyze_posts(self.df)
+            scores, details = self.credibility_analyzer.batch_analyze_posts(self.df)
+            display_columns = [col for col in self.CREDIBILITY_DISPLAY_COLUMNS if col in self.df.columns]
+            result_df = self.df[display_columns].join(scores)
             score_distribution = result_df['credibility_score'].describe()
             logger.info(f"Credibility score distribution: {score_distribution}")
-            return result_df
+            return result_df, details
             
         except Exception as e:
             logger.error(f"Error in credibility analysis: {str(e)}")
             logger.error(traceback.format_exc())
             return pd.DataFrame({
                 'error': [f"Failed to analyze credibility: {str(e)}"]
-            })
+            }), None
     
+    @memoized
     def generate_network_graph(self) -> Dict:
 
         try:
+            import networkx as nx
+            
             if 'author' not in self.df.columns or 'subreddit' not in self.df.columns:
                 return {"error": "Author and subreddit data required for network analysis"}
             
@@ -287,6 +261,7 @@ class AdvancedAnalysisAgent:
         except Exception as e:
             return {"error": f"Error in network graph generation: {str(e)}"}
     
+    @memoized
     def generate_topics(self, n_topics: int = 10) -> Dict:
 
         if len(self.df) < 10:
@@ -295,16 +270,7 @@ class AdvancedAnalysisAgent:
         try:
             from sklearn.decomposition import NMF
             
-            # Create TF-IDF matrix
-            vectorizer = TfidfVectorizer(
-                max_features=1000,
-                stop_words='english',
-                max_df=0.7,
-                min_df=10
-            )
-            
-            tfidf = vectorizer.fit_transform(self.df['combined_text'])
-            feature_names = vectorizer.get_feature_names_out()
+            tfidf, feature_names = self._tfidf_matrix()
             
             nmf = NMF(n_components=n_topics, random_state=42)
             nmf_results = nmf.fit_transform(tfidf)
@@ -315,21 +281,22 @@ class AdvancedAnalysisAgent:
                 top_words = [feature_names[i] for i in top_words_idx]
                 topic_terms[topic_idx] = top_words
             
-            self.df['topic_id'] = nmf_results.argmax(axis=1)
+            topic_ids = nmf_results.argmax(axis=1)
             
             topic_docs = {}
             for topic_id in range(n_topics):
-                docs = self.df[self.df['topic_id'] == topic_id]['title'].head(3).tolist()
+                docs = self.df['title'][topic_ids == topic_id].head(3).tolist()
                 topic_docs[topic_id] = docs
             
             topic_evolution_df = pd.DataFrame()
             if 'created_date' in self.df.columns:
-                self.df['date'] = self.df['created_date'].dt.date
+                dates = features_for(self.df)['date']
+                topic_series = pd.Series(topic_ids, index=self.df.index)
                 evolution_data = []
                 
-                for date in sorted(self.df['date'].unique()):
-                    date_mask = self.df['date'] == date
-                    topic_dist = self.df[date_mask]['topic_id'].value_counts()
+                for date in sorted(dates.unique()):
+                    date_mask = dates == date
+                    topic_dist = topic_series[date_mask].value_counts()
                     total = topic_dist.sum()
                     
                     for topic_id in range(n_topics):
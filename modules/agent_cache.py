@@ -0,0 +1,98 @@
+import threading
+import logging
+import functools
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+import pandas as pd
+import config
+
+logger = logging.getLogger(__name__)
+
+
+def frame_bytes(value: Dict[str, Any]) -> int:
+    return sum(int(item.memory_usage(deep=True).sum()) for item in value.values() if isinstance(item, pd.DataFrame))
+
+
+def memoized(method: Callable) -> Callable:
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        results = self.__dict__.setdefault('_results', {})
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        if key in results:
+            return results[key]
+        with self.__dict__.setdefault('_result_locks', {}).setdefault(key, threading.Lock()):
+            if key not in results:
+                results[key] = method(self, *args, **kwargs)
+        return results[key]
+    return wrapper
+
+
+def clear_results(agent: Any) -> None:
+    agent.__dict__.pop('_results', None)
+
+
+class AgentCache:
+
+    def __init__(self, max_bytes: int = config.AGENT_CACHE_MAX_BYTES,
+                 on_evict: Optional[Callable[[Any], None]] = None):
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.build_locks = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.entries
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Any],
+                      size_of: Callable[[Any], int] = frame_bytes) -> Any:
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self.lock:
+            build_lock = self.build_locks.setdefault(key, threading.Lock())
+        with build_lock:
+            value = self.get(key)
+            if value is None:
+                value = factory()
+                self.put(key, value, size_of(value))
+        with self.lock:
+            self.build_locks.pop(key, None)
+        return value
+
+    def put(self, key: Hashable, value: Any, size: int) -> None:
+        evicted = []
+        with self.lock:
+            self.entries[key] = (value, size)
+            self.entries.move_to_end(key)
+            total = sum(entry_size for _, entry_size in self.entries.values())
+            while total > self.max_bytes and len(self.entries) > 1:
+                evicted_key, (evicted_value, evicted_size) = self.entries.popitem(last=False)
+                total -= evicted_size
+                evicted.append(evicted_value)
+                logger.info(f"Evicted cached agents for {evicted_key} ({evicted_size / 1e6:.1f} MB)")
+        if self.on_evict is not None:
+            for evicted_value in evicted:
+                self.on_evict(evicted_value)
+
+    def discard(self, key: Hashable) -> None:
+        with self.lock:
+            entry = self.entries.pop(key, None)
+        if entry is not None and self.on_evict is not None:
+            self.on_evict(entry[0])
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
@@ -2,12 +2,14 @@ import pandas as pd
 import json
 import os
 from datetime import datetime
-import requests
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional
 import time
+import hashlib
 import logging
-import google.generativeai as genai
+import threading
+from collections import OrderedDict
 from dotenv import load_dotenv
+import config
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -16,45 +18,143 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 
+def _genai():
+    import google.generativeai as genai
+    return genai
+
+
+_shared_agent = None
+_shared_agent_lock = threading.Lock()
+
+
+def get_gemini_agent() -> 'GeminiSummaryAgent':
+    global _shared_agent
+    with _shared_agent_lock:
+        if _shared_agent is None:
+            _shared_agent = GeminiSummaryAgent()
+        return _shared_agent
+
+
 class GeminiSummaryAgent:
     AVAILABLE_MODELS = ['gemini-2.0-flash-exp']
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, status_ttl: float = config.GEMINI_STATUS_TTL):
         if api_key is None:
             api_key = os.getenv('GEMINI_API_KEY')
         
         self.api_key = api_key
-        self.has_valid_key = False
         self.model = None
-        
-        if self.api_key:
+        self.status_ttl = status_ttl
+        self.checked_at = None
+        self.probe_thread = None
+        self.lock = threading.Lock()
+        self._status = 'unchecked' if self.api_key else 'no_key'
+        self._configured = False
+        self.summary_cache = OrderedDict()
+    
+    def _client(self):
+        genai = _genai()
+        if not self._configured:
             genai.configure(api_key=self.api_key)
+            self._configured = True
+        return genai
+    
+    @property
+    def status(self) -> str:
+        if self.api_key and self._is_stale():
+            self.check_connection_async()
+        return self._status
+    
+    @property
+    def has_valid_key(self) -> bool:
+        return self.status == 'connected'
+    
+    def _is_stale(self) -> bool:
+        return self.checked_at is None or time.monotonic() - self.checked_at > self.status_ttl
+    
+    def check_connection_async(self) -> None:
+        with self.lock:
+            if self.probe_thread is not None and self.probe_thread.is_alive():
+                return
+            if self._status == 'unchecked':
+                self._status = 'checking'
+            self.probe_thread = threading.Thread(target=self.check_connection, name="gemini-probe", daemon=True)
+            self.probe_thread.start()
+    
+    def check_connection(self) -> bool:
+        for model_name in self.AVAILABLE_MODELS:
+            try:
+                genai = self._client()
+                genai.get_model(f"models/{model_name}")
+                self._set_status('connected', genai.GenerativeModel(model_name))
+                logger.info(f"Successfully connected to Gemini API using model: {model_name}")
+                return True
+            except Exception as e:
+                logger.warning(f"Failed to initialize model {model_name}: {str(e)}")
         
-            for model_name in self.AVAILABLE_MODELS:
-                try:
-                    self.model = genai.GenerativeModel(model_name)
-
-                    _ = self.model.generate_content("Test")
-                    self.has_valid_key = True
-                    logger.info(f"Successfully connected to Gemini API using model: {model_name}")
-                    break
-                except Exception as e:
-                    logger.warning(f"Failed to initialize model {model_name}: {str(e)}")
-                    continue
-            
-            if not self.has_valid_key:
-                logger.error("All Gemini models failed to initialize. Check your API key and models.")
-        self.summary_cache = {}
+        self._set_status('failed')
+        logger.error("All Gemini models failed to initialize. Check your API key and models.")
+        return False
+    
+    def _set_status(self, status: str, model=None) -> None:
+        with self.lock:
+            self._status = status
+            self.model = model
+            self.checked_at = time.monotonic()
+    
+    def _can_generate(self) -> bool:
+        if not self.api_key:
+            return False
+        return self._status != 'failed' or self._is_stale()
+    
+    def _generate_content(self, prompt: str):
+        model = self.model
+        if model is not None:
+            return model.generate_content(prompt)
+        
+        last_error = None
+        for model_name in self.AVAILABLE_MODELS:
+            model = self._client().GenerativeModel(model_name)
+            try:
+                response = model.generate_content(prompt)
+            except Exception as e:
+                logger.warning(f"Failed to generate with model {model_name}: {str(e)}")
+                last_error = e
+                continue
+            self._set_status('connected', model)
+            return response
+        
+        self._set_status('failed')
+        raise last_error
+    
+    def _summarize(self, kind: str, subreddit: Optional[str], prompt: str, label: str) -> str:
+        # The prompt carries the rows being summarised, so keying on it separates datasets,
+        # followed-file growth and subreddit filters without knowing which dataset it came from.
+        digest = hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+        cache_key = (kind, subreddit or 'all', digest)
+        with self.lock:
+            summary = self.summary_cache.get(cache_key)
+            if summary is not None:
+                self.summary_cache.move_to_end(cache_key)
+                return summary
+        
+        try:
+            summary = self._generate_content(prompt).text
+        except Exception as e:
+            logger.error(f"Error generating content: {str(e)}")
+            return f"Error generating {label} summary: {str(e)}"
+        
+        with self.lock:
+            self.summary_cache[cache_key] = summary
+            while len(self.summary_cache) > config.GEMINI_SUMMARY_CACHE_ENTRIES:
+                self.summary_cache.popitem(last=False)
+        return summary
     
     def generate_time_series_summary(self, time_data: pd.DataFrame, subreddit: str = None) -> str:
-        if not self.has_valid_key or self.model is None:
+        if not self._can_generate():
             logger.warning("No valid Gemini API connection. Using mock summary.")
             return self._get_mock_summary("time_series")
         
-        cache_key = f"time_series_{subreddit or 'all'}"
-        if cache_key in self.summary_cache:
-            return self.summary_cache[cache_key]
-        
         try:
             if time_data.empty:
                 return "No time series data available for analysis."
@@ -85,16 +185,7 @@ class GeminiSummaryAgent:
             Format your response as a paragraph without bulletpoints.
             """
             
-            try:
-                response = self.model.generate_content(prompt)
-                summary = response.text
-                
-                self.summary_cache[cache_key] = summary
-                return summary
-            
-            except Exception as e:
-                logger.error(f"Error generating content: {str(e)}")
-                return f"Error generating time series summary: {str(e)}"
+            return self._summarize("time_series", subreddit, prompt, "time series")
             
         except Exception as e:
             logger.error(f"Error in time series summary generation: {str(e)}")
@@ -102,14 +193,10 @@ class GeminiSummaryAgent:
     
     def generate_topic_summary(self, topic_data: Dict, subreddit: str = None) -> str:
 
-        if not self.has_valid_key or self.model is None:
+        if not self._can_generate():
             logger.warning("No valid Gemini API connection. Using mock summary.")
             return self._get_mock_summary("topic")
         
-        cache_key = f"topic_{subreddit or 'all'}"
-        if cache_key in self.summary_cache:
-            return self.summary_cache[cache_key]
-        
         try:
             if "error" in topic_data:
                 return f"Topic modeling error: {topic_data['error']}"
@@ -144,31 +231,20 @@ class GeminiSummaryAgent:
             Format your response as a paragraph without bulletpoints. Focus on insights that would be valuable to someone unfamiliar with this subreddit.
             """
             
-            try:
-                response = self.model.generate_content(prompt)
-                summary = response.text
-                
-                self.summary_cache[cache_key] = summary
-                return summary
-            
-            except Exception as e:
-                logger.error(f"Error generating content: {str(e)}")
-                return f"Error generating topic summary: {str(e)}"
+            return self._summarize("topic", subreddit, prompt, "topic")
             
         except Exception as e:
             logger.error(f"Error in topic summary generation: {str(e)}")
             return f"Unable to generate topic summary: {str(e)}"
     
-    def generate_misinformation_summary(self, credibility_df: pd.DataFrame) -> str:
+    def generate_misinformation_summary(self, credibility_df: pd.DataFrame,
+                                        explain: Optional[Callable[[pd.DataFrame], pd.Series]] = None,
+                                        subreddit: str = None) -> str:
 
-        if not self.has_valid_key or self.model is None:
+        if not self._can_generate():
             logger.warning("No valid Gemini API connection. Using mock summary.")
             return self._get_mock_summary("misinformation")
         
-        cache_key = "misinformation_summary"
-        if cache_key in self.summary_cache:
-            return self.summary_cache[cache_key]
-        
         try:
             if credibility_df.empty:
                 return "No credibility data available for analysis."
@@ -179,6 +255,8 @@ class GeminiSummaryAgent:
             
             if low_cred_count > 0:
                 low_cred_examples = credibility_df.sort_values('credibility_score').head(3)
+                if explain is not None and 'credibility_flags' in low_cred_examples.columns:
+                    low_cred_examples = low_cred_examples.assign(credibility_factors=explain(low_cred_examples))
                 examples_text = ""
                 
                 for i, (_, post) in enumerate(low_cred_examples.iterrows()):
@@ -206,18 +284,7 @@ class GeminiSummaryAgent:
             Format your response as a paragraph without bulletpoints.
             """
             
-            
-            try:
-                response = self.model.generate_content(prompt)
-                summary = response.text
-                
-                
-                self.summary_cache[cache_key] = summary
-                return summary
-            
-            except Exception as e:
-                logger.error(f"Error generating content: {str(e)}")
-                return f"Error generating credibility summary: {str(e)}"
+            return self._summarize("misinformation", subreddit, prompt, "credibility")
             
         except Exception as e:
             logger.error(f"Error in credibility summary generation: {str(e)}")
@@ -229,9 +296,9 @@ class GeminiSummaryAgent:
         
         try:
             
-            genai.configure(api_key=self.api_key)
+            _genai().configure(api_key=self.api_key)
             
-            models = genai.list_models()
+            models = _genai().list_models()
             
             gemini_models = [model.name.split('/')[-1] for model in models 
                             if 'gemini' in model.name.lower()]
@@ -262,8 +329,8 @@ class GeminiSummaryAgent:
             results.append("\nTesting model connectivity:")
             for model_name in self.AVAILABLE_MODELS:
                 try:
-                    genai.configure(api_key=self.api_key)
-                    model = genai.GenerativeModel(model_name)
+                    _genai().configure(api_key=self.api_key)
+                    model = self._client().GenerativeModel(model_name)
                     _ = model.generate_content("Hello, testing 1-2-3")
                     results.append(f" {model_name}: Success")
                 except Exception as e:
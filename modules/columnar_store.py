@@ -0,0 +1,240 @@
+import os
+import hashlib
+import logging
+from typing import Optional
+import numpy as np
+import pandas as pd
+import config
+from modules.data_ingestion import DataIngestionAgent, _detect_compression, _decompressed, _iter_frames
+from modules.dedup import BloomFilter, hash_keys
+from modules.derived_columns import features_for
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pq
+    import pyarrow.dataset as pads
+    import pyarrow.compute as pc
+except ImportError:
+    pyarrow = None
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+logger = logging.getLogger(__name__)
+
+
+class ColumnarStore:
+
+    SCHEMA_VERSION = 1
+    STRING_COLUMNS = ['id', 'name', 'subreddit', 'title', 'selftext', 'author', 'domain', 'url']
+    INTEGER_COLUMNS = ['score', 'num_comments', 'created_utc', 'retrieved_on']
+
+    FEATURE_SQL = {
+        'subreddit': "subreddit",
+        'date': "CAST(created_date AS DATE)",
+        'week_start': "CAST(created_date AS DATE) - CAST(dayofweek(created_date) AS INTEGER)",
+        'month_start': "CAST(date_trunc('month', created_date) AS DATE)",
+        'day_of_week': "isodow(created_date) - 1",
+        'hour': "hour(created_date)",
+    }
+    DATE_FEATURES = ['date', 'week_start', 'month_start']
+    SCAN_BATCH_ROWS = 1_000_000
+    PARTIALS_PER_MERGE = 64
+
+    def __init__(self, path: str):
+        if pyarrow is None:
+            raise ValueError("pyarrow is required for the out-of-core store")
+        self.path = path
+        self.dataset = pads.dataset(path, format='parquet')
+        self.engine = 'duckdb' if duckdb is not None else 'pyarrow'
+
+    @classmethod
+    def schema(cls):
+        fields = [(col, pyarrow.string()) for col in cls.STRING_COLUMNS]
+        fields += [(col, pyarrow.int64()) for col in cls.INTEGER_COLUMNS]
+        fields.append(('created_date', pyarrow.timestamp('s')))
+        return pyarrow.schema(fields)
+
+    @classmethod
+    def store_key(cls, source: str, dedup: Optional[str] = config.INGEST_DEDUP) -> str:
+        # Stat-based so large archives are never hashed; ingest settings that change the rows are included.
+        stat = os.stat(source)
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"v{cls.SCHEMA_VERSION}:{os.path.abspath(source)}:{stat.st_size}:{stat.st_mtime_ns}:"
+                      f"{dedup}:{tuple(DataIngestionAgent.FIELDS)!r}".encode())
+        return digest.hexdigest()
+
+    @classmethod
+    def for_file(cls, source: str, store_dir: str = config.OUT_OF_CORE_DIR,
+                 dedup: Optional[str] = config.INGEST_DEDUP) -> 'ColumnarStore':
+        path = os.path.join(store_dir, f"{cls.store_key(source, dedup)}.parquet")
+        if not os.path.exists(path):
+            os.makedirs(store_dir, exist_ok=True)
+            cls.build(source, path, dedup=dedup)
+        return cls(path)
+
+    @classmethod
+    def build(cls, source: str, path: str, chunk_size: int = config.INGEST_CHUNK_SIZE,
+              dedup: Optional[str] = config.INGEST_DEDUP) -> None:
+        if pyarrow is None:
+            raise ValueError("pyarrow is required for the out-of-core store")
+
+        schema = cls.schema()
+        bloom = BloomFilter(config.DEDUP_BLOOM_CAPACITY, config.DEDUP_BLOOM_ERROR_RATE) if dedup == 'bloom' else None
+        tmp_path = f"{path}.tmp"
+        deduped_path = f"{path}.dedup.tmp"
+        rows = bad_lines = duplicates = 0
+        try:
+            with open(source, 'rb') as f, pq.ParquetWriter(tmp_path, schema) as writer:
+                stream = _decompressed(f, _detect_compression(f))
+                for frame, batch_bad_lines in _iter_frames(stream, chunk_size, DataIngestionAgent.FIELDS):
+                    bad_lines += batch_bad_lines
+                    if frame is None:
+                        continue
+                    if bloom is not None:
+                        frame, dropped = DataIngestionAgent._drop_seen(frame, bloom)
+                        duplicates += dropped
+                    writer.write_table(pyarrow.Table.from_pandas(cls._conform(frame), schema=schema, preserve_index=False))
+                    rows += len(frame)
+            if dedup == 'exact':
+                dropped = cls._keep_newest(tmp_path, deduped_path)
+                if dropped:
+                    duplicates += dropped
+                    rows -= dropped
+                    os.replace(deduped_path, tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            for leftover in (tmp_path, deduped_path):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+            raise ValueError(f"Error building columnar store: {str(e)}")
+
+        if bad_lines:
+            logger.warning(f"Skipped {bad_lines} malformed JSONL lines")
+        if duplicates:
+            logger.info(f"Dropped {duplicates} duplicate posts")
+        logger.info(f"Wrote {rows} posts from {source} to {path}")
+
+    @classmethod
+    def _keep_newest(cls, path: str, out_path: str) -> int:
+        # Exact dedup needs every key before deciding, so only key hashes and recency columns
+        # are held in memory; the rows themselves are streamed into the rewritten file.
+        key_columns = DataIngestionAgent.DEDUP_KEYS + DataIngestionAgent.RECENCY_COLUMNS
+        parquet_file = pq.ParquetFile(path)
+        batches = [batch.to_pandas() for batch in parquet_file.iter_batches(batch_size=cls.SCAN_BATCH_ROWS,
+                                                                            columns=key_columns)]
+        if not batches:
+            return 0
+        keys = pd.concat(batches, ignore_index=True)
+        del batches
+        key = next((key for key in DataIngestionAgent.DEDUP_KEYS if keys[key].notna().any()), None)
+        if key is None:
+            return 0
+        has_key = keys[key].notna().to_numpy()
+        hashes = np.zeros(len(keys), dtype=np.uint64)
+        hashes[has_key] = hash_keys(keys.loc[has_key, key])
+        frame = pd.DataFrame({key: pd.arrays.IntegerArray(hashes, ~has_key)})
+        for col in DataIngestionAgent.RECENCY_COLUMNS:
+            frame[col] = keys[col]
+        del keys
+
+        keep = np.ones(len(frame), dtype=bool)
+        keep[DataIngestionAgent._stale_rows(frame, key).to_numpy()] = False
+        if keep.all():
+            return 0
+
+        offset = 0
+        with pq.ParquetWriter(out_path, parquet_file.schema_arrow) as writer:
+            for batch in parquet_file.iter_batches(batch_size=cls.SCAN_BATCH_ROWS):
+                mask = keep[offset:offset + batch.num_rows]
+                offset += batch.num_rows
+                writer.write_table(pyarrow.Table.from_batches([batch]).filter(pyarrow.array(mask)))
+        return int((~keep).sum())
+
+    @classmethod
+    def _conform(cls, frame: pd.DataFrame) -> pd.DataFrame:
+        columns = {}
+        for col in cls.STRING_COLUMNS:
+            columns[col] = frame[col].astype('string') if col in frame.columns else pd.Series(pd.NA, index=frame.index, dtype='string')
+        for col in cls.INTEGER_COLUMNS:
+            values = pd.to_numeric(frame[col], errors='coerce') if col in frame.columns else pd.Series(np.nan, index=frame.index)
+            columns[col] = values.round().astype('Int64')
+        columns['selftext'] = columns['selftext'].fillna('')
+        columns['score'] = columns['score'].fillna(0)
+        columns['created_date'] = pd.to_datetime(columns['created_utc'], unit='s').astype('datetime64[s]')
+        return pd.DataFrame(columns)
+
+    def __len__(self) -> int:
+        return self.dataset.count_rows()
+
+    def sample(self, n_rows: int = config.OUT_OF_CORE_SAMPLE_ROWS) -> pd.DataFrame:
+        parquet_file = pq.ParquetFile(self.path, memory_map=True)
+        n_groups = parquet_file.num_row_groups
+        total = parquet_file.metadata.num_rows
+        if total <= n_rows:
+            table = parquet_file.read()
+        else:
+            n_picked = max(1, min(n_groups, int(np.ceil(n_groups * n_rows / total))))
+            groups = np.unique(np.linspace(0, n_groups - 1, n_picked).astype(int))
+            table = parquet_file.read_row_groups(groups.tolist())
+
+        df = table.to_pandas()
+        for col in DataIngestionAgent.CATEGORICAL_COLUMNS:
+            df[col] = df[col].astype('category')
+        for col in DataIngestionAgent.TEXT_COLUMNS:
+            df[col] = df[col].fillna('').astype('string[pyarrow]')
+        for col in DataIngestionAgent.INTEGER_COLUMNS:
+            if not df[col].hasnans:
+                df[col] = pd.to_numeric(df[col].astype('int64'), downcast='integer')
+        logger.info(f"Sampled {len(df)} of {total} posts from {self.path}")
+        return df
+
+    def counts_by(self, name: str) -> pd.Series:
+        if name not in self.FEATURE_SQL:
+            raise ValueError(f"Error counting posts: unknown feature {name}")
+        if self.engine == 'duckdb':
+            counts = self._query_counts(name)
+        else:
+            counts = self._scan_counts(name)
+        if name in self.DATE_FEATURES:
+            counts.index = pd.to_datetime(counts.index)
+        return counts.rename_axis(name).rename('count')
+
+    def average_score(self) -> float:
+        if self.engine == 'duckdb':
+            return float(self._query("SELECT avg(score) FROM {posts}").iloc[0, 0])
+        total = count = 0
+        for batch in self.dataset.to_batches(columns=['score'], batch_size=self.SCAN_BATCH_ROWS):
+            column = batch.column(0)
+            total += pc.sum(column).as_py() or 0
+            count += len(column) - column.null_count
+        return total / count if count else float('nan')
+
+    def _query(self, sql: str) -> pd.DataFrame:
+        posts = "read_parquet('{}')".format(self.path.replace("'", "''"))
+        with duckdb.connect() as con:
+            con.execute(f"SET memory_limit='{config.OUT_OF_CORE_MEMORY_LIMIT}'")
+            return con.execute(sql.format(posts=posts)).df()
+
+    def _query_counts(self, name: str) -> pd.Series:
+        expr = self.FEATURE_SQL[name]
+        result = self._query(
+            f"SELECT {expr} AS key, count(*) AS count FROM {{posts}} "
+            f"WHERE {expr} IS NOT NULL GROUP BY 1 ORDER BY 1"
+        )
+        return result.set_index('key')['count']
+
+    def _scan_counts(self, name: str) -> pd.Series:
+        column = 'subreddit' if name == 'subreddit' else 'created_date'
+        partials = []
+        for batch in self.dataset.to_batches(columns=[column], batch_size=self.SCAN_BATCH_ROWS):
+            frame = batch.to_pandas()
+            key = frame[column] if name == 'subreddit' else features_for(frame)[name]
+            partials.append(frame.groupby(key).size())
+            if len(partials) >= self.PARTIALS_PER_MERGE:
+                partials = [pd.concat(partials).groupby(level=0).sum()]
+        if not partials:
+            return pd.Series(dtype='int64')
+        return pd.concat(partials).groupby(level=0).sum().sort_index()
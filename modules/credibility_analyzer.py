@@ -1,72 +1,101 @@
+import os
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
 import re
-import nltk
-from nltk.sentiment import SentimentIntensityAnalyzer
-import requests
 from urllib.parse import urlparse
-from typing import Dict, List, Any, Tuple, Set
+from typing import Dict, List, Any, Tuple, Set, Optional
 import logging
 import config
+from modules.sentiment import get_sentiment_engine, sentiment_texts
+from modules.lexicon_matcher import PhraseMatcher, read_lexicon
+from modules.score_cache import ScoreCache
+from modules.credibility_factors import (FACTOR_IDS, FLAGS_DTYPE, DETAIL_COLUMNS, empty_details,
+                                         factor_bit, factor_text)
+from modules.domain_reputation import (DomainReputationIndex, PublicSuffixList, DOMAIN_LIST_FILES,
+                                       HOST_PATTERN, TRUSTED, UNTRUSTED, read_domain_list)
 
 logger = logging.getLogger(__name__)
 
+def content_hashes(title: np.ndarray, text: np.ndarray, score: np.ndarray) -> np.ndarray:
+    frame = pd.DataFrame({'title': title, 'selftext': text, 'score': np.asarray(score, dtype=float)})
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+
 class CredibilityAnalyzer:
     
-    CREDIBILITY_MARKERS = {
-        'evidence': [
-            'according to', 'study finds', 'evidence shows', 'data indicates', 
-            'researchers found', 'analysis shows', 'statistics reveal',
-            'experts say', 'survey indicates', 'sources confirm'
-        ],
-        'balanced_language': [
-            'on the other hand', 'however', 'alternatively', 'in contrast',
-            'different perspective', 'opposing view', 'some argue', 
-            'critics say', 'debate', 'discussion'
-        ],
-        'precision': [
-            'specifically', 'precisely', 'exactly', 'approximately',
-            'estimated', 'about', 'around', 'measured', 'calculated'
-        ]
+    RULES_VERSION = 3
+    EXTREME_SENTIMENT = np.float32(0.8)
+    JITTER_MODES = ['random', 'hash', 'off']
+    LEXICON_FILES = {
+        'marker': 'credibility_markers.txt',
+        'detractor': 'credibility_detractors.txt'
     }
+    LANGUAGE_RULES = [
+        ('marker', 10, 'credible_language'),
+        ('detractor', -15, 'questionable_language')
+    ]
     
-    CREDIBILITY_DETRACTORS = {
-        'conspiracy': [
-            'conspiracy', 'coverup', 'cover-up', 'hoax', 'illuminati', 
-            'nwo', 'deep state', 'they don\'t want you to know', 
-            'what they\'re hiding', 'secret agenda', 'mind control'
-        ],
-        'sensationalism': [
-            'shocking', 'bombshell', 'unbelievable', 'mind-blowing',
-            'you won\'t believe', 'jaw-dropping', 'explosive', 
-            'scandalous', 'outrageous', 'banned'
-        ],
-        'hedging': [
-            'maybe', 'perhaps', 'possibly', 'allegedly', 'reportedly',
-            'supposedly', 'claimed', 'rumored', 'anonymous sources'
-        ],
-        'urgency': [
-            'urgent', 'breaking', 'alert', 'emergency', 'crisis', 
-            'act now', 'limited time', 'warning', 'danger'
-        ]
-    }
+    def __init__(self, lexicon_dir: str = config.LEXICON_DIR, jitter: str = config.CREDIBILITY_JITTER,
+                 cache_path: Optional[str] = config.CREDIBILITY_CACHE_PATH):
+        if jitter not in self.JITTER_MODES:
+            raise ValueError(f"Error configuring credibility jitter: expected one of {self.JITTER_MODES}, got {jitter!r}")
+        self.sentiment = get_sentiment_engine()
+        self.suffixes = PublicSuffixList.from_file()
+        self.jitter = jitter
+        self.score_cache = ScoreCache(cache_path) if cache_path and jitter != 'random' else None
+        self.lexicon_dir = lexicon_dir
+        self.lexicon_version = 0
+        self._lexicon_mtimes = None
+        self.reload_lexicons()
     
-    def __init__(self):
+    def reload_lexicons(self, force: bool = False) -> bool:
+        files = {**self.LEXICON_FILES, **DOMAIN_LIST_FILES}
+        paths = {group: os.path.join(self.lexicon_dir, name) for group, name in files.items()}
         try:
-            nltk.data.find('vader_lexicon')
-        except LookupError:
-            nltk.download('vader_lexicon', quiet=True)
+            mtimes = tuple(os.stat(path).st_mtime_ns for path in paths.values())
+        except OSError as e:
+            raise ValueError(f"Error loading credibility lexicons: {str(e)}")
+        if not force and mtimes == self._lexicon_mtimes:
+            return False
         
-        self.sia = SentimentIntensityAnalyzer()
-        self.trusted_domains = config.TRUSTED_DOMAINS
-        self.untrusted_domains = config.UNTRUSTED_DOMAINS
+        categories = {}
+        for group in self.LEXICON_FILES:
+            categories.update({(group, category): phrases for category, phrases in read_lexicon(paths[group]).items()})
+        domain_lists = {group: read_domain_list(paths[group]) for group in DOMAIN_LIST_FILES}
+        
+        self.matcher = PhraseMatcher(categories)
+        self.domains = DomainReputationIndex(domain_lists['trusted'], domain_lists['untrusted'], self.suffixes)
+        self.ruleset_version = self._ruleset_version({**categories, **{(group, 'domain'): domains for group, domains in domain_lists.items()}})
+        self._lexicon_mtimes = mtimes
+        self.lexicon_version += 1
+        logger.info(f"Loaded {len(self.matcher.phrases)} credibility phrases and {len(self.domains)} domain reputations "
+                    f"from {self.lexicon_dir} using {self.matcher.engine}")
+        return True
+    
+    def _ruleset_version(self, categories: Dict[Tuple[str, str], List[str]]) -> str:
+        digest = hashlib.blake2b(digest_size=8)
+        digest.update(f"v{self.RULES_VERSION}:{self.jitter}:{self.sentiment.available}".encode())
+        for (group, category), phrases in categories.items():
+            digest.update(f"\n[{group}:{category}]\n".encode())
+            digest.update("\n".join(phrases).encode())
+        return digest.hexdigest()
+    
+    def _jitter(self, hashes: np.ndarray) -> np.ndarray:
+        if self.jitter == 'off':
+            return np.zeros(len(hashes), dtype=np.int64)
+        if self.jitter == 'hash':
+            return (hashes % np.uint64(7)).astype(np.int64) - 3
+        return np.random.randint(-3, 4, size=len(hashes))
     
     def analyze_post(self, title: str, text: str, score: int = 0, author: str = '') -> Tuple[int, List[str]]:
 
         factors = []
         base_score = 50  
-        title = str(title or '')
-        text = str(text or '')
+        title = '' if pd.isna(title) else str(title)
+        text = '' if pd.isna(text) else str(text)
         combined_text = f"{title} {text}".lower()
         
         score_adjustments = []
@@ -77,26 +106,22 @@ class CredibilityAnalyzer:
         if re.search(r'[!?]{2,}', title):
             score_adjustments.append((-10, "Uses excessive punctuation"))
         
-        trusted_domains_found = []
-        for domain in self.trusted_domains:
-            if domain in combined_text:
-                trusted_domains_found.append(domain)
+        matcher = self.matcher
+        domains = self.domains
+        matched_categories = {category for _, category in matcher.find(combined_text)}
         
+        mentioned = [domains.lookup(host) for host in HOST_PATTERN.findall(combined_text)]
+        trusted_domains_found = list(dict.fromkeys(domain for domain, reputation in mentioned if reputation == TRUSTED))
         if trusted_domains_found:
             score_adjustments.append((15, f"References trusted source(s): {', '.join(trusted_domains_found)}"))
         
-        untrusted_domains_found = []
-        for domain in self.untrusted_domains:
-            if domain in combined_text:
-                untrusted_domains_found.append(domain)
-        
+        untrusted_domains_found = list(dict.fromkeys(domain for domain, reputation in mentioned if reputation == UNTRUSTED))
         if untrusted_domains_found:
             score_adjustments.append((-20, f"References untrusted source(s): {', '.join(untrusted_domains_found)}"))
         
-        sentiment = self.sia.polarity_scores(combined_text)
-        compound = sentiment['compound']
+        compound = self.sentiment.score([combined_text])['compound'].iloc[0]
         
-        if abs(compound) > 0.8:  # Very extreme sentiment
+        if abs(compound) > self.EXTREME_SENTIMENT:
             score_adjustments.append((-10, "Contains extremely emotional language"))
         
         if len(combined_text) < 20:
@@ -104,16 +129,11 @@ class CredibilityAnalyzer:
         elif len(combined_text) > 500:
             score_adjustments.append((5, "Detailed explanation"))
         
-        for category, markers in self.CREDIBILITY_MARKERS.items():
-            matching_markers = [marker for marker in markers if marker in combined_text]
-            if matching_markers:
-                score_adjustments.append((10, f"Uses credible language: {category}"))
-                break  
-        for category, detractors in self.CREDIBILITY_DETRACTORS.items():
-            matching_detractors = [detractor for detractor in detractors if detractor in combined_text]
-            if matching_detractors:
-                score_adjustments.append((-15, f"Uses questionable language: {category}"))
-                break  # Count only once per category
+        for group, adjustment, factor in self.LANGUAGE_RULES:
+            category = next((category for category in matcher.categories
+                             if category[0] == group and category in matched_categories), None)
+            if category is not None:
+                score_adjustments.append((adjustment, factor_text(factor, category[1])))
       
         if score > 100:
             score_adjustments.append((10, "Highly upvoted by community"))
@@ -123,15 +143,16 @@ class CredibilityAnalyzer:
         urls = re.findall(r'https?://(?:[-\w.]|(?:%[\da-fA-F]{2}))+', combined_text)
         if urls:
             url_domains = [urlparse(url).netloc for url in urls]
-            trusted_url_count = sum(1 for domain in url_domains if any(trusted in domain for trusted in self.trusted_domains))
-            untrusted_url_count = sum(1 for domain in url_domains if any(untrusted in domain for untrusted in self.untrusted_domains))
+            url_reputations = [domains.lookup(domain)[1] for domain in url_domains]
+            trusted_url_count = url_reputations.count(TRUSTED)
+            untrusted_url_count = url_reputations.count(UNTRUSTED)
             
             if trusted_url_count > 0:
                 score_adjustments.append((trusted_url_count * 5, f"Contains {trusted_url_count} link(s) to reputable sources"))
             if untrusted_url_count > 0:
                 score_adjustments.append((untrusted_url_count * -10, f"Contains {untrusted_url_count} link(s) to questionable sources"))
     
-        random_factor = np.random.randint(-3, 4)
+        random_factor = int(self._jitter(content_hashes([title], [text], [score]))[0])
         score_adjustments.append((random_factor, None)) 
         for adjustment, factor in score_adjustments:
             base_score += adjustment
@@ -142,25 +163,169 @@ class CredibilityAnalyzer:
         
         return final_score, factors
     
-    def batch_analyze_posts(self, df: pd.DataFrame) -> pd.DataFrame:
+    def batch_analyze_posts(self, df: pd.DataFrame, workers: Optional[int] = config.CREDIBILITY_WORKERS,
+                            chunk_size: int = config.CREDIBILITY_CHUNK_ROWS) -> Tuple[pd.DataFrame, pd.DataFrame]:
         logger.info(f"Batch analyzing {len(df)} posts for credibility")
-        result_df = df.copy()
-        
-        result_df['credibility_score'] = 0
-        result_df['credibility_factors'] = ''
-        
-        for idx, row in result_df.iterrows():
-            title = row.get('title', '')
-            text = row.get('selftext', '')
-            score = row.get('score', 0)
-            author = row.get('author', '')
-            
-            cred_score, cred_factors = self.analyze_post(title, text, score, author)
-            
-            result_df.at[idx, 'credibility_score'] = cred_score
-            result_df.at[idx, 'credibility_factors'] = ", ".join(cred_factors) if cred_factors else "No specific factors detected"
-        
+        n_posts = len(df)
+        title = self._text_column(df, 'title')
+        text = self._text_column(df, 'selftext')
+        score = pd.to_numeric(df['score'], errors='coerce').to_numpy(dtype=float) if 'score' in df.columns else np.zeros(n_posts)
+
+        hashes = content_hashes(title, text, score)
+        jitter = self._jitter(hashes)
+        cacheable = self.jitter != 'random'
+        if cacheable:
+            codes, _ = pd.factorize(hashes)
+            first = np.unique(codes, return_index=True)[1]
+        else:
+            codes = first = np.arange(n_posts)
+
+        if self.score_cache is not None:
+            found, unique_scores, unique_flags, unique_details = self.score_cache.lookup(hashes[first], self.ruleset_version)
+        else:
+            found = np.zeros(len(first), dtype=bool)
+            unique_scores = np.zeros(len(first), dtype=np.int8)
+            unique_flags = np.zeros(len(first), dtype=FLAGS_DTYPE)
+            unique_details = empty_details()
+
+        todo = first[~found]
+        if len(todo):
+            workers = workers or os.cpu_count() or 1
+            texts = sentiment_texts(pd.Series(title[todo]), pd.Series(text[todo])).to_numpy(dtype=object)
+            compound = self.sentiment.score(texts)['compound'].to_numpy()
+            if workers > 1 and len(todo) > chunk_size:
+                new_scores, new_flags, new_details = self._score_parallel(title[todo], text[todo], score[todo], jitter[todo],
+                                                                          compound, workers, chunk_size)
+            else:
+                new_scores, new_flags, new_details = self._score_columns(title[todo], text[todo], score[todo],
+                                                                         jitter[todo], compound)
+            unique_scores[~found] = new_scores
+            unique_flags[~found] = new_flags
+            if self.score_cache is not None:
+                self.score_cache.store(hashes[todo], self.ruleset_version, new_scores, new_flags, new_details)
+            new_details = new_details.assign(row=np.flatnonzero(~found)[new_details['row'].to_numpy()])
+            unique_details = pd.concat([unique_details, new_details], ignore_index=True)
+        if found.any():
+            logger.info(f"Reused {found.sum()} cached credibility scores and scored {len(todo)} new posts")
+
+        result_df = pd.DataFrame({
+            'credibility_score': unique_scores[codes],
+            'credibility_flags': unique_flags[codes]
+        }, index=df.index)
+        details = self._expand_details(unique_details, codes, df.index)
+
         score_stats = result_df['credibility_score'].describe()
         logger.info(f"Credibility score distribution: min={score_stats['min']:.1f}, max={score_stats['max']:.1f}, mean={score_stats['mean']:.1f}")
         
-        return result_df
+        return result_df, details
+
+    @staticmethod
+    def _expand_details(details: pd.DataFrame, codes: np.ndarray, index: pd.Index) -> pd.DataFrame:
+        # Duplicate posts share one set of details; fan them back out to every post label.
+        posts = pd.DataFrame({'post': index, 'row': codes})
+        expanded = posts[posts['row'].isin(details['row'])].merge(details, on='row', sort=False)
+        return pd.DataFrame({'post': expanded['post'],
+                             'factor': expanded['factor'].astype(np.int8),
+                             'detail': expanded['detail'].astype('category')})
+
+    def _score_parallel(self, title: np.ndarray, text: np.ndarray, score: np.ndarray, jitter: np.ndarray,
+                        compound: np.ndarray, workers: int, chunk_size: int) -> Tuple[np.ndarray, np.ndarray, pd.DataFrame]:
+        starts = range(0, len(title), chunk_size)
+        logger.info(f"Scoring credibility in {len(starts)} chunks with {workers} workers")
+        # Spawned workers avoid inheriting locks held by the analysis scheduler's threads.
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=_init_worker, initargs=(self.lexicon_dir,)) as executor:
+            results = list(executor.map(
+                _score_chunk,
+                [title[start:start + chunk_size] for start in starts],
+                [text[start:start + chunk_size] for start in starts],
+                [score[start:start + chunk_size] for start in starts],
+                [jitter[start:start + chunk_size] for start in starts],
+                [compound[start:start + chunk_size] for start in starts]
+            ))
+        details = [chunk_details.assign(row=chunk_details['row'] + start)
+                   for start, (_, _, chunk_details) in zip(starts, results)]
+        return (np.concatenate([scores for scores, _, _ in results]), np.concatenate([flags for _, flags, _ in results]),
+                pd.concat(details, ignore_index=True))
+
+    def _score_columns(self, title: np.ndarray, text: np.ndarray, score: np.ndarray,
+                       jitter: np.ndarray, compound: np.ndarray) -> Tuple[np.ndarray, np.ndarray, pd.DataFrame]:
+        n_posts = len(title)
+        title = pd.Series(title, dtype=object)
+        combined_text = (title + ' ' + pd.Series(text, dtype=object)).str.lower()
+
+        adjustments = np.zeros(n_posts, dtype=np.int64)
+        flags = np.zeros(n_posts, dtype=FLAGS_DTYPE)
+        details = []
+
+        def add(mask, adjustment, factor, rows=None, detail=None):
+            mask = np.asarray(mask, dtype=bool)
+            adjustments[mask] += np.asarray(adjustment)[mask] if np.ndim(adjustment) else adjustment
+            flags[mask] |= factor_bit(factor)
+            if rows is not None and len(rows):
+                details.append(pd.DataFrame({'row': rows, 'factor': np.int8(FACTOR_IDS[factor]), 'detail': detail}))
+
+        add(title.str.contains(r'[A-Z]{5,}').to_numpy(), -15, 'excessive_caps')
+        add(title.str.contains(r'[!?]{2,}').to_numpy(), -10, 'excessive_punctuation')
+
+        matcher = self.matcher
+        domains = self.domains
+        present = matcher.present(matcher.match(combined_text), n_posts)
+        mentions = combined_text.str.findall(HOST_PATTERN).explode().dropna()
+        mentioned, reputation = domains.lookup_many(mentions.to_numpy())
+        for value, adjustment, factor in ((TRUSTED, 15, 'trusted_sources'), (UNTRUSTED, -20, 'untrusted_sources')):
+            found = pd.DataFrame({'row': mentions.index.to_numpy(dtype=np.int64)[reputation == value],
+                                  'detail': mentioned[reputation == value]}).drop_duplicates()
+            add(np.isin(np.arange(n_posts), found['row'].to_numpy()), adjustment, factor,
+                found['row'].to_numpy(), found['detail'].to_numpy())
+
+        add(np.abs(compound) > self.EXTREME_SENTIMENT, -10, 'emotional_language')
+
+        length = combined_text.str.len().to_numpy()
+        add(length < 20, -5, 'short_content')
+        add(length > 500, 5, 'detailed_explanation')
+
+        for group, adjustment, factor in self.LANGUAGE_RULES:
+            matched = np.zeros(n_posts, dtype=bool)
+            for category_id, category in enumerate(matcher.categories):
+                if category[0] == group:
+                    hit = ~matched & present[:, category_id]
+                    add(hit, adjustment, factor, np.flatnonzero(hit), category[1])
+                    matched |= hit
+
+        add(score > 100, 10, 'upvoted')
+        add(score < 0, -5, 'downvoted')
+
+        with_links = np.flatnonzero(combined_text.str.contains('http', regex=False).to_numpy(dtype=bool))
+        hosts = combined_text.iloc[with_links].str.extractall(r'https?://((?:[-\w.]|(?:%[\da-fA-F]{2}))+)')[0]
+        positions = np.asarray(hosts.index.get_level_values(0), dtype=np.intp)
+        host_reputation = domains.lookup_many(hosts.to_numpy())[1]
+        for value, weight, factor in ((TRUSTED, 5, 'reputable_links'), (UNTRUSTED, -10, 'questionable_links')):
+            counts = np.bincount(positions[host_reputation == value], minlength=n_posts)
+            linked = np.flatnonzero(counts)
+            add(counts > 0, counts * weight, factor, linked, counts[linked].astype(str).astype(object))
+
+        adjustments += jitter
+        scores = np.clip(50 + adjustments, 0, 100).astype(np.int8)
+        details = pd.concat(details, ignore_index=True)[DETAIL_COLUMNS] if details else empty_details()
+        return scores, flags, details
+
+    @staticmethod
+    def _text_column(df: pd.DataFrame, name: str) -> np.ndarray:
+        if name not in df.columns:
+            return np.full(len(df), '', dtype=object)
+        return df[name].fillna('').astype(str).to_numpy(dtype=object)
+
+
+_worker_analyzer = None
+
+
+def _init_worker(lexicon_dir: str) -> None:
+    global _worker_analyzer
+    _worker_analyzer = CredibilityAnalyzer(lexicon_dir, cache_path=None)
+
+
+def _score_chunk(title: np.ndarray, text: np.ndarray, score: np.ndarray,
+                 jitter: np.ndarray, compound: np.ndarray) -> Tuple[np.ndarray, np.ndarray, pd.DataFrame]:
+    return _worker_analyzer._score_columns(title, text, score, jitter, compound)
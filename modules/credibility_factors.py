@@ -0,0 +1,60 @@
+from typing import Optional
+import numpy as np
+import pandas as pd
+
+FACTORS = [
+    ('excessive_caps', "Excessive capitalization", "Uses excessive capitalization"),
+    ('excessive_punctuation', "Excessive punctuation", "Uses excessive punctuation"),
+    ('trusted_sources', "References trusted sources", "References trusted source(s): {}"),
+    ('untrusted_sources', "References untrusted sources", "References untrusted source(s): {}"),
+    ('emotional_language', "Extremely emotional language", "Contains extremely emotional language"),
+    ('short_content', "Very short content", "Very short content"),
+    ('detailed_explanation', "Detailed explanation", "Detailed explanation"),
+    ('credible_language', "Credible language", "Uses credible language: {}"),
+    ('questionable_language', "Questionable language", "Uses questionable language: {}"),
+    ('upvoted', "Highly upvoted", "Highly upvoted by community"),
+    ('downvoted', "Downvoted", "Downvoted by community"),
+    ('reputable_links', "Links to reputable sources", "Contains {} link(s) to reputable sources"),
+    ('questionable_links', "Links to questionable sources", "Contains {} link(s) to questionable sources")
+]
+FACTOR_IDS = {name: factor_id for factor_id, (name, _, _) in enumerate(FACTORS)}
+FLAGS_DTYPE = np.int32
+DETAIL_COLUMNS = ['row', 'factor', 'detail']
+NO_FACTORS = "No specific factors detected"
+
+
+def factor_bit(name: str) -> int:
+    return 1 << FACTOR_IDS[name]
+
+
+def factor_text(name: str, detail: Optional[str] = None) -> str:
+    template = FACTORS[FACTOR_IDS[name]][2]
+    return template.format(detail) if '{}' in template else template
+
+
+def empty_details() -> pd.DataFrame:
+    return pd.DataFrame({'row': np.array([], dtype=np.int64),
+                         'factor': np.array([], dtype=np.int8),
+                         'detail': np.array([], dtype=object)})
+
+
+def decode_factors(flags: pd.Series, details: pd.DataFrame) -> pd.Series:
+    # Only meant for the few posts a page displays; aggregate with factor_counts instead.
+    details = details[details['post'].isin(flags.index)]
+    joined = details.groupby(['post', 'factor'], sort=False)['detail'].agg(lambda values: ', '.join(map(str, values)))
+    texts = []
+    for post, value in flags.items():
+        factors = [factor_text(name, joined.get((post, factor_id)))
+                   for factor_id, (name, _, _) in enumerate(FACTORS) if int(value) >> factor_id & 1]
+        texts.append(', '.join(factors) if factors else NO_FACTORS)
+    return pd.Series(texts, index=flags.index, dtype=object)
+
+
+def factor_counts(flags: pd.Series, by: pd.Series) -> pd.DataFrame:
+    values = flags.to_numpy()
+    present = pd.DataFrame({label: (values & (1 << factor_id)) != 0
+                            for factor_id, (_, label, _) in enumerate(FACTORS)})
+    groups = present.groupby(by.to_numpy(), observed=True)
+    counts = groups.sum()
+    counts.insert(0, 'posts', groups.size())
+    return counts
@@ -1,69 +1,452 @@
 import pandas as pd
+import numpy as np
 import json
 from datetime import datetime
 import re
-from typing import Union, List, Dict, Any
+from typing import Union, List, Dict, Any, Iterator, BinaryIO, Tuple, Optional, Sequence, Callable
 import io
+import os
+import gzip
+import bz2
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import config
+from modules.dedup import KeyIndex, BloomFilter, hash_keys
+from modules.derived_columns import extend_features
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+logger = logging.getLogger(__name__)
+
+
+COMPRESSION_MAGIC = {
+    'gzip': b'\x1f\x8b',
+    'zstd': b'\x28\xb5\x2f\xfd',
+    'bz2': b'BZh',
+}
+
+
+def _detect_compression(stream: BinaryIO) -> Optional[str]:
+    position = stream.tell()
+    header = stream.read(4)
+    stream.seek(position)
+    for compression, magic in COMPRESSION_MAGIC.items():
+        if header.startswith(magic):
+            return compression
+    return None
+
+
+def _decompressed(stream: BinaryIO, compression: Optional[str]) -> BinaryIO:
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj=stream, mode='rb')
+    if compression == 'bz2':
+        return bz2.BZ2File(stream, mode='rb')
+    if compression == 'zstd':
+        if zstandard is None:
+            raise ValueError("zstandard is required to read .zst files")
+        return zstandard.ZstdDecompressor().stream_reader(stream, read_across_frames=True)
+    return stream
+
+
+def _iter_line_batches(stream: BinaryIO, chunk_size: int, limit: Optional[int] = None) -> Iterator[List[bytes]]:
+    remainder = b''
+    while limit is None or limit > 0:
+        chunk = stream.read(chunk_size if limit is None else min(chunk_size, limit))
+        if not chunk:
+            break
+        if limit is not None:
+            limit -= len(chunk)
+        lines = (remainder + chunk).split(b'\n')
+        remainder = lines.pop()
+        if lines:
+            yield lines
+    if remainder.strip():
+        yield [remainder]
+
+
+def _parse_batch(lines: List[bytes], fields: Optional[Sequence[str]]) -> Tuple[Optional[pd.DataFrame], int]:
+    posts = []
+    bad_lines = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            item = _json_loads(line)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            bad_lines += 1
+            continue
+        if isinstance(item, dict) and 'data' in item:
+            posts.append(item['data'])
+
+    if not posts:
+        return None, bad_lines
+    if fields is None:
+        return pd.DataFrame(posts), bad_lines
+
+    columns = {}
+    for field in fields:
+        values = [post.get(field) for post in posts]
+        if any(value is not None for value in values):
+            columns[field] = values
+    return pd.DataFrame(columns), bad_lines
+
+
+def _iter_frames(stream: BinaryIO, chunk_size: int, fields: Optional[Sequence[str]],
+                 limit: Optional[int] = None,
+                 frame_filter: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None) -> Iterator[Tuple[Optional[pd.DataFrame], int]]:
+    for lines in _iter_line_batches(stream, chunk_size, limit):
+        frame, bad_lines = _parse_batch(lines, fields)
+        if frame is not None and frame_filter is not None:
+            frame = frame_filter(frame)
+        if frame is not None and not len(frame):
+            frame = None
+        yield frame, bad_lines
+
+
+def _read_frames(stream: BinaryIO, chunk_size: int, fields: Optional[Sequence[str]],
+                 limit: Optional[int] = None,
+                 frame_filter: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None) -> Tuple[List[pd.DataFrame], int]:
+    frames = []
+    bad_lines = 0
+    for frame, batch_bad_lines in _iter_frames(stream, chunk_size, fields, limit, frame_filter):
+        bad_lines += batch_bad_lines
+        if frame is not None:
+            frames.append(frame)
+    return frames, bad_lines
+
+
+def _parse_shard(path: str, start: int, end: int, chunk_size: int,
+                 fields: Optional[Sequence[str]]) -> Tuple[Optional[pd.DataFrame], int]:
+    with open(path, 'rb') as f:
+        f.seek(start)
+        frames, bad_lines = _read_frames(f, chunk_size, fields, limit=end - start)
+    if not frames:
+        return None, bad_lines
+    return pd.concat(frames, ignore_index=True), bad_lines
+
+
+def _shard_ranges(path: str, n_shards: int, size: int) -> List[Tuple[int, int]]:
+    boundaries = [0]
+    with open(path, 'rb') as f:
+        for i in range(1, n_shards):
+            f.seek(size * i // n_shards)
+            f.readline()
+            boundary = f.tell()
+            if boundaries[-1] < boundary < size:
+                boundaries.append(boundary)
+    boundaries.append(size)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def _complete_length(path: str, block_size: int = 64 * 1024) -> int:
+    position = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        while position > 0:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            newline = f.read(step).rfind(b'\n')
+            if newline >= 0:
+                return position + newline + 1
+    return 0
+
 
 class DataIngestionAgent:
 
-    def __init__(self, file_path: Union[str, io.BytesIO]):
+    CATEGORICAL_COLUMNS = ['subreddit', 'author', 'domain']
+    INTEGER_COLUMNS = ['score', 'num_comments']
+    TEXT_COLUMNS = ['title', 'selftext']
+
+    DEDUP_KEYS = ['name', 'id']
+    RECENCY_COLUMNS = ['retrieved_on', 'score']
+
+    FIELDS = [
+        'id', 'name', 'subreddit', 'title', 'selftext', 'author', 'score',
+        'created_utc', 'retrieved_on', 'url', 'domain', 'permalink',
+        'num_comments', 'upvote_ratio', 'is_self', 'over_18', 'link_flair_text'
+    ]
 
+    def __init__(self, file_path: Union[str, io.BytesIO], chunk_size: int = config.INGEST_CHUNK_SIZE,
+                 keep_extra_fields: bool = False, workers: Optional[int] = config.INGEST_WORKERS,
+                 follow: bool = False, dedup: Optional[str] = config.INGEST_DEDUP):
+
+        self.file_path = file_path
+        self.follow = follow
+        self.offset = 0
+        self.listeners = []
+        self.read_lock = threading.Lock()
+        self.chunk_size = chunk_size
+        self.fields = None if keep_extra_fields else self.FIELDS
+        self.workers = workers or os.cpu_count() or 1
+        self.compression = None
+        self.bad_lines = 0
+        self.bad_lines_per_shard = []
+        self.dedup = dedup
+        self.duplicates_dropped = 0
+        self.key_index = KeyIndex() if dedup == 'exact' and follow else None
+        self.bloom = BloomFilter(config.DEDUP_BLOOM_CAPACITY, config.DEDUP_BLOOM_ERROR_RATE) if dedup == 'bloom' else None
         self.df = self._load_data(file_path)
-        self._preprocess_data()
-    
+        self._preprocess_data(self.df)
+        if self.dedup == 'exact':
+            self.df = self._drop_duplicates(self.df)
+        if self.key_index is not None:
+            self._index_keys(self.df)
+        if self.duplicates_dropped:
+            logger.info(f"Dropped {self.duplicates_dropped} duplicate posts")
+        self.memory_report = self._compact_dtypes(self.df)
+
     def _load_data(self, file_path: Union[str, io.BytesIO]) -> pd.DataFrame:
 
         try:
             if isinstance(file_path, str):
+                with open(file_path, 'rb') as f:
+                    self.compression = _detect_compression(f)
+                    if self.follow and self.compression is not None:
+                        raise ValueError("Follow mode requires an uncompressed JSONL file")
 
-                posts = []
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        if line.strip():
-                            try:
-                                item = json.loads(line)
-                                if isinstance(item, dict) and 'data' in item:
-                                    posts.append(item['data'])
-                            except json.JSONDecodeError:
-                                continue
+                    size = _complete_length(file_path) if self.follow else os.path.getsize(file_path)
+                    if self.compression is None and self._use_shards(size):
+                        frames = self._read_sharded(file_path, size)
+                    else:
+                        frames = self._read_stream(f, limit=size if self.follow else None)
+                    self.offset = size
             else:
-                posts = []
-                content = file_path.getvalue().decode('utf-8')
-                for line in content.splitlines():
-                    if line.strip():
-                        try:
-                            item = json.loads(line)
-                            if isinstance(item, dict) and 'data' in item:
-                                posts.append(item['data'])
-                        except json.JSONDecodeError:
-                            continue
-            
-            if not posts:
+                if self.follow:
+                    raise ValueError("Follow mode is only available for files on disk")
+                file_path.seek(0)
+                self.compression = _detect_compression(file_path)
+                frames = self._read_stream(file_path)
+
+            if self.bad_lines:
+                logger.warning(f"Skipped {self.bad_lines} malformed JSONL lines")
+            if not frames:
                 raise ValueError("No valid Reddit posts found in the file")
-                
-            df = pd.DataFrame(posts)
+
+            df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
             return df
-            
+
         except Exception as e:
             raise ValueError(f"Error loading JSONL data: {str(e)}")
-    
-    def _preprocess_data(self):
-        if 'created_utc' in self.df.columns:
-            self.df['created_date'] = pd.to_datetime(self.df['created_utc'], unit='s')
-            
-            self.df['date'] = self.df['created_date'].dt.date
-            self.df['year'] = self.df['created_date'].dt.year
-            self.df['month'] = self.df['created_date'].dt.month
-            self.df['day'] = self.df['created_date'].dt.day
-            self.df['day_of_week'] = self.df['created_date'].dt.dayofweek
-            self.df['hour'] = self.df['created_date'].dt.hour
+
+    def _read_stream(self, stream: BinaryIO, limit: Optional[int] = None) -> List[pd.DataFrame]:
+        frame_filter = self._bloom_filter_frame if self.bloom is not None else None
+        frames, bad_lines = _read_frames(_decompressed(stream, self.compression), self.chunk_size,
+                                         self.fields, limit, frame_filter)
+        self.bad_lines += bad_lines
+        return frames
+
+    def _use_shards(self, size: int) -> bool:
+        return self.workers > 1 and size >= config.PARALLEL_INGEST_MIN_BYTES
+
+    def _read_sharded(self, path: str, size: int) -> List[pd.DataFrame]:
+        ranges = _shard_ranges(path, self.workers, size)
+        logger.info(f"Parsing {path} in {len(ranges)} shards with {self.workers} workers")
+
+        frames = []
+        # Spawned workers avoid inheriting locks held by other sessions' threads in the Streamlit server.
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=context) as executor:
+            results = executor.map(
+                _parse_shard,
+                [path] * len(ranges),
+                [start for start, _ in ranges],
+                [end for _, end in ranges],
+                [self.chunk_size] * len(ranges),
+                [self.fields] * len(ranges)
+            )
+            for frame, bad_lines in results:
+                self.bad_lines_per_shard.append(bad_lines)
+                if frame is not None and self.bloom is not None:
+                    frame = self._bloom_filter_frame(frame)
+                if frame is not None:
+                    frames.append(frame)
+
+        self.bad_lines += sum(self.bad_lines_per_shard)
+        return frames
+
+    @classmethod
+    def _dedup_key(cls, df: pd.DataFrame) -> Optional[str]:
+        for key in cls.DEDUP_KEYS:
+            if key in df.columns:
+                return key
+        return None
+
+    @classmethod
+    def _stale_rows(cls, df: pd.DataFrame, key: str) -> pd.Index:
+        # Every keyed row except the newest copy by RECENCY_COLUMNS; ties keep the last one read.
+        recency = [col for col in cls.RECENCY_COLUMNS if col in df.columns]
+        ordered = df.sort_values(recency, kind='stable', na_position='first') if recency else df
+        duplicated = ordered.duplicated(key, keep='last') & ordered[key].notna()
+        return ordered.index[duplicated.to_numpy()]
+
+    @classmethod
+    def _drop_seen(cls, frame: pd.DataFrame, bloom: BloomFilter) -> Tuple[pd.DataFrame, int]:
+        key = cls._dedup_key(frame)
+        if key is None:
+            return frame, 0
+        has_key = frame[key].notna()
+        first = ~frame.duplicated(key, keep='first') | ~has_key
+        frame = frame[first]
+        has_key = has_key[first]
+        hashes = hash_keys(frame.loc[has_key, key])
+        seen = np.zeros(len(frame), dtype=bool)
+        seen[has_key.to_numpy()] = bloom.contains(hashes)
+        bloom.add(hashes)
+        return frame[~seen], int((~first).sum() + seen.sum())
+
+    def _drop_duplicates(self, df: pd.DataFrame) -> pd.DataFrame:
+        key = self._dedup_key(df)
+        if key is None:
+            return df
+        stale = self._stale_rows(df, key)
+        if not len(stale):
+            return df
+        self.duplicates_dropped += len(stale)
+        return df.drop(index=stale).reset_index(drop=True)
+
+    def _bloom_filter_frame(self, frame: pd.DataFrame) -> pd.DataFrame:
+        frame, dropped = self._drop_seen(frame, self.bloom)
+        self.duplicates_dropped += dropped
+        return frame
+
+    def _index_keys(self, df: pd.DataFrame) -> None:
+        key = self._dedup_key(df)
+        if key is not None:
+            self.key_index.add(hash_keys(df[key].dropna()))
+
+    def _merge_seen_rows(self, new_df: pd.DataFrame) -> pd.DataFrame:
+        key = self._dedup_key(new_df)
+        if key is None or key not in self.df.columns:
+            return new_df
+        has_key = new_df[key].notna()
+        seen = np.zeros(len(new_df), dtype=bool)
+        seen[has_key.to_numpy()] = self.key_index.contains(hash_keys(new_df.loc[has_key, key]))
+        if not seen.any():
+            return new_df
+
+        recency = [col for col in self.RECENCY_COLUMNS if col in new_df.columns and col in self.df.columns]
+        seen_keys = new_df.loc[seen, key]
+        old_rows = self.df.loc[self.df[key].isin(seen_keys), [key] + recency].assign(_new=False)
+        candidates = pd.concat([old_rows, new_df.loc[seen, [key] + recency].assign(_new=True)], ignore_index=True)
+        if recency:
+            candidates = candidates.sort_values(recency, kind='stable', na_position='first')
+        newest = candidates.drop_duplicates(key, keep='last')
+        replaced_keys = newest.loc[newest['_new'], key]
+
+        self.df = self.df[~self.df[key].isin(replaced_keys)].reset_index(drop=True)
+        keep = ~seen | new_df[key].isin(replaced_keys).to_numpy()
+        self.duplicates_dropped += int(len(new_df) - keep.sum() + len(replaced_keys))
+        return new_df[keep]
+
+    def _preprocess_data(self, df: pd.DataFrame) -> None:
+        if 'created_utc' in df.columns:
+            df['created_date'] = pd.to_datetime(df['created_utc'], unit='s')
         
-        if 'selftext' in self.df.columns:
-            self.df['selftext'] = self.df['selftext'].fillna('')
+        if 'selftext' in df.columns:
+            df['selftext'] = df['selftext'].fillna('')
         
-        if 'score' in self.df.columns:
-            self.df['score'] = pd.to_numeric(self.df['score'], errors='coerce').fillna(0).astype(int)
+        if 'score' in df.columns:
+            df['score'] = pd.to_numeric(df['score'], errors='coerce').fillna(0).astype(int)
     
+    def _compact_dtypes(self, df: pd.DataFrame) -> Dict[str, int]:
+        before = int(df.memory_usage(deep=True).sum())
+
+        for col in self.CATEGORICAL_COLUMNS:
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+
+        for col in self.INTEGER_COLUMNS:
+            if col in df.columns and pd.api.types.is_integer_dtype(df[col]):
+                df[col] = pd.to_numeric(df[col], downcast='integer')
+
+        if pyarrow is not None:
+            for col in self.TEXT_COLUMNS:
+                if col in df.columns:
+                    df[col] = df[col].fillna('').astype('string[pyarrow]')
+
+        after = int(df.memory_usage(deep=True).sum())
+        logger.info(f"Compacted dataset from {before / 1e6:.1f} MB to {after / 1e6:.1f} MB")
+        return {'before_bytes': before, 'after_bytes': after}
+
+    def add_listener(self, callback: Callable[[pd.DataFrame, pd.DataFrame], None]) -> None:
+        self.listeners.append(callback)
+
+    def read_new_rows(self) -> int:
+        if not self.follow:
+            raise ValueError("read_new_rows requires follow=True")
+        # Sessions share one agent; reading, merging and notifying must not interleave.
+        with self.read_lock:
+            return self._read_new_rows()
+
+    def _read_new_rows(self) -> int:
+        end = _complete_length(self.file_path)
+        if end < self.offset:
+            logger.warning(f"{self.file_path} shrank below the last read offset; ignoring until it grows again")
+            return 0
+        if end == self.offset:
+            return 0
+
+        with open(self.file_path, 'rb') as f:
+            f.seek(self.offset)
+            frame_filter = self._bloom_filter_frame if self.bloom is not None else None
+            frames, bad_lines = _read_frames(f, self.chunk_size, self.fields, end - self.offset, frame_filter)
+        self.offset = end
+        self.bad_lines += bad_lines
+        if not frames:
+            return 0
+
+        old_df = self.df
+        new_df = pd.concat(frames, ignore_index=True)
+        self._preprocess_data(new_df)
+        if self.dedup == 'exact':
+            new_df = self._drop_duplicates(new_df)
+            new_df = self._merge_seen_rows(new_df)
+            self._index_keys(new_df)
+        if not len(new_df):
+            return 0
+        self._compact_dtypes(new_df)
+
+        old_len = len(self.df)
+        unchanged_prefix = self.df is old_df
+        self.df = pd.concat(self._align_categories(self.df, new_df), ignore_index=True)
+        new_rows = self.df.iloc[old_len:]
+        if unchanged_prefix:
+            extend_features(old_df, self.df, new_rows)
+        logger.info(f"Appended {len(new_rows)} new posts from {self.file_path}")
+
+        for callback in self.listeners:
+            callback(self.df, new_rows)
+        return len(new_rows)
+
+    def _align_categories(self, df: pd.DataFrame, new_df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        # Sessions may still be reading df, so widen categories on a shallow copy instead of in place.
+        for col in self.CATEGORICAL_COLUMNS:
+            if col not in df.columns or col not in new_df.columns:
+                continue
+            if not isinstance(df[col].dtype, pd.CategoricalDtype):
+                continue
+            missing = new_df[col].cat.categories.difference(df[col].cat.categories)
+            if len(missing):
+                df = df.copy(deep=False)
+                df[col] = df[col].cat.add_categories(missing)
+            new_df[col] = new_df[col].cat.set_categories(df[col].cat.categories)
+        return df, new_df
+
     def get_dataframe(self) -> pd.DataFrame:
         return self.df
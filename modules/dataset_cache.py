@@ -0,0 +1,99 @@
+import os
+import hashlib
+import logging
+from typing import Optional, Sequence, Union, BinaryIO
+import pandas as pd
+import config
+
+try:
+    import pyarrow.feather as feather
+except ImportError:
+    feather = None
+
+logger = logging.getLogger(__name__)
+
+
+class DatasetCache:
+
+    SCHEMA_VERSION = 5
+    HASH_CHUNK_SIZE = 8 * 1024 * 1024
+
+    def __init__(self, cache_dir: str = config.DATASET_CACHE_DIR, max_bytes: int = config.DATASET_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.enabled = feather is not None
+        if self.enabled:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        else:
+            logger.info("pyarrow not installed; dataset cache disabled")
+
+    @classmethod
+    def fingerprint(cls, source: Union[str, BinaryIO], settings: Sequence = ()) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        # Settings that change the parsed frame (dedup mode, field projection) are part of the key.
+        digest.update(f"v{cls.SCHEMA_VERSION}:{tuple(settings)!r}".encode())
+        if isinstance(source, str):
+            with open(source, 'rb') as f:
+                cls._hash_stream(f, digest)
+        else:
+            source.seek(0)
+            cls._hash_stream(source, digest)
+            source.seek(0)
+        return digest.hexdigest()
+
+    @classmethod
+    def _hash_stream(cls, stream: BinaryIO, digest) -> None:
+        while True:
+            chunk = stream.read(cls.HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.feather")
+
+    def load(self, key: str) -> Optional[pd.DataFrame]:
+        if not self.enabled:
+            return None
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            table = feather.read_table(path, memory_map=True)
+            os.utime(path)
+            logger.info(f"Loaded cached dataset {key}")
+            return table.to_pandas()
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cache entry {key}: {str(e)}")
+            os.remove(path)
+            return None
+
+    def store(self, key: str, df: pd.DataFrame) -> None:
+        if not self.enabled:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        try:
+            feather.write_feather(df.reset_index(drop=True), tmp_path, compression='uncompressed')
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Could not cache dataset {key}: {str(e)}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.feather'):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(os.path.join(self.cache_dir, name))
+            total -= size
+            logger.info(f"Evicted cached dataset {name}")
@@ -0,0 +1,150 @@
+import gc
+import os
+import time
+import threading
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional
+import pandas as pd
+import config
+from modules.derived_columns import features_for
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+
+def current_rss() -> int:
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class DatasetStore:
+
+    def __init__(self, rss_budget: int = config.DATASET_RSS_BUDGET_BYTES,
+                 lease_seconds: float = config.DATASET_LEASE_SECONDS,
+                 on_evict: Optional[Callable[[Hashable], None]] = None,
+                 rss: Callable[[], int] = current_rss):
+        self.rss_budget = rss_budget
+        self.lease_seconds = lease_seconds
+        self.on_evict = on_evict
+        self.rss = rss
+        self.frames = OrderedDict()
+        self.sizes: Dict[Hashable, int] = {}
+        self.holders: Dict[Hashable, Dict[str, float]] = {}
+        self.held_by: Dict[str, Hashable] = {}
+        self.lock = threading.RLock()
+        self.load_locks = {}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.frames
+
+    def get(self, key: Hashable) -> Optional[pd.DataFrame]:
+        with self.lock:
+            df = self.frames.get(key)
+            if df is not None:
+                self.frames.move_to_end(key)
+            return df
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        df = self.get(key)
+        if df is not None:
+            return df
+
+        with self.lock:
+            load_lock = self.load_locks.setdefault(key, threading.Lock())
+        with load_lock:
+            df = self.get(key)
+            if df is None:
+                df = loader()
+                self._insert(key, df)
+        with self.lock:
+            self.load_locks.pop(key, None)
+        self.enforce_budget()
+        return df
+
+    def put(self, key: Hashable, df: pd.DataFrame) -> pd.DataFrame:
+        # Replaces the frame under key, e.g. when a followed file grows; leases on key carry over.
+        if self.get(key) is not df:
+            self._insert(key, df)
+            self.enforce_budget()
+        return df
+
+    def _insert(self, key: Hashable, df: pd.DataFrame) -> None:
+        size = int(df.memory_usage(deep=True).sum())
+        with self.lock:
+            self.frames[key] = df
+            self.frames.move_to_end(key)
+            self.sizes[key] = size
+        logger.info(f"Stored dataset {key} ({size / 1e6:.1f} MB)")
+
+    def hold(self, holder: str, key: Hashable) -> None:
+        with self.lock:
+            previous = self.held_by.get(holder)
+            if previous is not None and previous != key:
+                self.holders.get(previous, {}).pop(holder, None)
+            self.held_by[holder] = key
+            self.holders.setdefault(key, {})[holder] = time.monotonic()
+            if key in self.frames:
+                self.frames.move_to_end(key)
+
+    def release(self, holder: str) -> None:
+        with self.lock:
+            key = self.held_by.pop(holder, None)
+            if key is not None:
+                self.holders.get(key, {}).pop(holder, None)
+
+    def refcount(self, key: Hashable) -> int:
+        cutoff = time.monotonic() - self.lease_seconds
+        with self.lock:
+            holders = self.holders.get(key, {})
+            for holder, seen in list(holders.items()):
+                if seen < cutoff:
+                    holders.pop(holder)
+                    if self.held_by.get(holder) == key:
+                        self.held_by.pop(holder)
+            return len(holders)
+
+    def enforce_budget(self) -> None:
+        while True:
+            with self.lock:
+                rss = self.rss()
+                if rss <= self.rss_budget:
+                    return
+                key = next((key for key in self.frames if not self.refcount(key)), None)
+                if key is None:
+                    logger.warning(f"RSS {rss / 1e6:.0f} MB exceeds the dataset budget but every dataset is in use")
+                    return
+                self.frames.pop(key)
+                size = self.sizes.pop(key, 0)
+                self.holders.pop(key, None)
+            logger.info(f"Evicted dataset {key} ({size / 1e6:.1f} MB)")
+            if self.on_evict is not None:
+                self.on_evict(key)
+            # Measure again rather than trusting the estimate: the frame is only freed
+            # once nothing else references it.
+            gc.collect()
+
+    def memory_usage(self) -> pd.DataFrame:
+        rows = []
+        with self.lock:
+            items = list(self.frames.items())
+        for key, df in items:
+            derived_bytes = features_for(df).nbytes()
+            rows.append({
+                'dataset': key,
+                'rows': len(df),
+                'frame_bytes': self.sizes.get(key, 0),
+                'derived_bytes': derived_bytes,
+                'sessions': self.refcount(key)
+            })
+        return pd.DataFrame(rows, columns=['dataset', 'rows', 'frame_bytes', 'derived_bytes', 'sessions'])
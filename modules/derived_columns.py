@@ -0,0 +1,208 @@
+import threading
+import weakref
+import functools
+from typing import Callable, Dict, List, Optional
+import pandas as pd
+
+URL_PATTERN = r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'
+
+_registries = {}
+_registries_lock = threading.RLock()
+
+
+class DerivedColumns:
+
+    FEATURES: Dict[str, Callable[['DerivedColumns'], pd.Series]] = {}
+
+    def __init__(self, df: pd.DataFrame):
+        # A weak reference lets the frame, and with it this registry, be garbage collected.
+        self.df_ref = weakref.ref(df)
+        self.version = 0
+        self.cache = {}
+        self.sizes: Dict[str, int] = {}
+        self.lock = threading.RLock()
+        self.feature_locks = {}
+
+    @property
+    def df(self) -> pd.DataFrame:
+        df = self.df_ref()
+        if df is None:
+            raise ValueError("Error computing derived columns: the DataFrame has been garbage collected")
+        return df
+
+    @classmethod
+    def register(cls, name: str):
+        def decorator(func: Callable[['DerivedColumns'], pd.Series]):
+            cls.FEATURES[name] = func
+            return func
+        return decorator
+
+    def __getitem__(self, name: str) -> pd.Series:
+        with self.lock:
+            if name in self.cache:
+                return self.cache[name]
+            feature_lock = self.feature_locks.setdefault(name, threading.Lock())
+
+        with feature_lock:
+            with self.lock:
+                if name in self.cache:
+                    return self.cache[name]
+                version = self.version
+            series = self.FEATURES[name](self).rename(name)
+            self.store(name, series, version)
+            return series
+
+    def store(self, name: str, series: pd.Series, version: Optional[int] = None) -> None:
+        # Measured once here so memory reports don't rescan list-valued columns.
+        size = int(series.memory_usage(deep=True))
+        with self.lock:
+            # A feature computed before the frame was marked changed is stale.
+            if version is not None and version != self.version:
+                return
+            if name not in self.cache:
+                self.cache[name] = series
+                self.sizes[name] = size
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.FEATURES
+
+    def cached(self) -> List[str]:
+        return list(self.cache)
+
+    def nbytes(self) -> int:
+        with self.lock:
+            return sum(self.sizes.values())
+
+    def invalidate(self) -> None:
+        with self.lock:
+            self.version += 1
+            self.cache.clear()
+            self.sizes.clear()
+
+
+def features_for(df: pd.DataFrame) -> DerivedColumns:
+    key = id(df)
+    with _registries_lock:
+        registry = _registries.get(key)
+        if registry is None or registry.df_ref() is not df:
+            registry = DerivedColumns(df)
+            _registries[key] = registry
+            weakref.finalize(df, _forget, key, registry)
+        return registry
+
+
+def mark_changed(df: pd.DataFrame) -> None:
+    # Call after editing df in place; frames replaced by a new object get a fresh registry anyway.
+    registry = _registries.get(id(df))
+    if registry is not None and registry.df_ref() is df:
+        registry.invalidate()
+
+
+def _forget(key: int, registry: DerivedColumns) -> None:
+    with _registries_lock:
+        if _registries.get(key) is registry:
+            del _registries[key]
+
+
+def extend_features(old_df: pd.DataFrame, df: pd.DataFrame, new_rows: pd.DataFrame) -> None:
+    old = _registries.get(id(old_df))
+    if old is None or old.df_ref() is not old_df or len(old_df) + len(new_rows) != len(df):
+        return
+    new = features_for(df)
+    delta = DerivedColumns(new_rows)
+    with old.lock:
+        cached = list(old.cache.items())
+    for name, series in cached:
+        extended = pd.concat([series, delta[name]])
+        extended.index = df.index
+        new.store(name, extended)
+
+
+@DerivedColumns.register('date')
+def _date(features: DerivedColumns) -> pd.Series:
+    return features.df['created_date'].dt.normalize()
+
+
+@DerivedColumns.register('year')
+def _year(features: DerivedColumns) -> pd.Series:
+    return features.df['created_date'].dt.year.astype('int16')
+
+
+@DerivedColumns.register('month')
+def _month(features: DerivedColumns) -> pd.Series:
+    return features.df['created_date'].dt.month.astype('int8')
+
+
+@DerivedColumns.register('day')
+def _day(features: DerivedColumns) -> pd.Series:
+    return features.df['created_date'].dt.day.astype('int8')
+
+
+@DerivedColumns.register('day_of_week')
+def _day_of_week(features: DerivedColumns) -> pd.Series:
+    return features.df['created_date'].dt.dayofweek.astype('int8')
+
+
+@DerivedColumns.register('hour')
+def _hour(features: DerivedColumns) -> pd.Series:
+    return features.df['created_date'].dt.hour.astype('int8')
+
+
+@DerivedColumns.register('week_start')
+def _week_start(features: DerivedColumns) -> pd.Series:
+    days_since_sunday = (features['day_of_week'].astype('int64') + 1) % 7
+    return features['date'] - pd.to_timedelta(days_since_sunday, unit='D')
+
+
+@DerivedColumns.register('month_start')
+def _month_start(features: DerivedColumns) -> pd.Series:
+    return features['date'] - pd.to_timedelta(features['day'].astype('int64') - 1, unit='D')
+
+
+@DerivedColumns.register('combined_text')
+def _combined_text(features: DerivedColumns) -> pd.Series:
+    df = features.df
+    if 'selftext' in df.columns:
+        combined_text = df['title'].fillna('') + ' ' + df['selftext'].fillna('')
+    else:
+        combined_text = df['title']
+    if isinstance(combined_text.dtype, pd.StringDtype):
+        return combined_text
+    return combined_text.astype(str)
+
+
+@DerivedColumns.register('urls')
+def _urls(features: DerivedColumns) -> pd.Series:
+    return features['combined_text'].str.findall(URL_PATTERN)
+
+
+@DerivedColumns.register('title_keywords')
+def _title_keywords(features: DerivedColumns) -> pd.Series:
+    from modules.nlp_resources import stopword_list, word_tokenize
+    stop_words = set(stopword_list())
+
+    def extract_keywords(text):
+        tokens = word_tokenize(text.lower())
+        return [word for word in tokens
+                if len(word) > 3
+                and word.isalpha()
+                and word not in stop_words]
+
+    return features.df['title'].astype(str).apply(extract_keywords)
+
+
+def _sentiment(features: DerivedColumns, column: str) -> pd.Series:
+    from modules.sentiment import SENTIMENT_COLUMNS, get_sentiment_engine, sentiment_texts
+    df = features.df
+    version = features.version
+    text = df['selftext'] if 'selftext' in df.columns else pd.Series('', index=df.index)
+    frame = get_sentiment_engine().score(sentiment_texts(df['title'], text).to_numpy(dtype=object))
+    frame.index = df.index
+    for col in SENTIMENT_COLUMNS:
+        if col != column:
+            features.store(f"sentiment_{col}", frame[col].rename(f"sentiment_{col}"), version)
+    return frame[column]
+
+
+for _column in ['compound', 'pos', 'neg', 'neu']:
+    DerivedColumns.register(f"sentiment_{_column}")(functools.partial(_sentiment, column=_column))
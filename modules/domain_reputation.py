@@ -0,0 +1,130 @@
+import os
+import re
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+import numpy as np
+import pandas as pd
+import config
+
+logger = logging.getLogger(__name__)
+
+DOMAIN_LIST_FILES = {
+    'trusted': 'trusted_domains.txt',
+    'untrusted': 'untrusted_domains.txt'
+}
+TRUSTED = 1
+UNTRUSTED = -1
+
+HOST_PATTERN = re.compile(r'(?<![\w.-])(?:[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?\.)+[a-z][a-z0-9-]*[a-z0-9](?![\w-])')
+IP_PATTERN = re.compile(r'^[\d.:]+$')
+
+
+def read_domain_list(path: str) -> List[str]:
+    domains = []
+    try:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                tokens = line.split('#', 1)[0].split()
+                if not tokens:
+                    continue
+                # Accept hosts-file lines ("0.0.0.0 example.com") and full URLs as well as bare domains.
+                token = tokens[1] if len(tokens) > 1 and IP_PATTERN.match(tokens[0]) else tokens[0]
+                if '://' in token:
+                    token = urlparse(token).hostname or ''
+                domain = token.lower().strip('.')
+                if domain.startswith('www.'):
+                    domain = domain[4:]
+                if domain:
+                    domains.append(domain)
+    except OSError as e:
+        raise ValueError(f"Error reading domain list {path}: {str(e)}")
+    return domains
+
+
+class PublicSuffixList:
+
+    def __init__(self, rules: Iterable[str] = ()):
+        self.rules = set()
+        self.exceptions = set()
+        for rule in rules:
+            if rule.startswith('!'):
+                self.exceptions.add(rule[1:])
+            else:
+                self.rules.add(rule)
+
+    @classmethod
+    def from_file(cls, path: str = config.PUBLIC_SUFFIX_LIST_PATH) -> 'PublicSuffixList':
+        if not os.path.exists(path):
+            logger.warning(f"Public suffix list not found at {path}; treating the last label of each host as its suffix")
+            return cls()
+        with open(path, encoding='utf-8') as f:
+            rules = [line.split()[0].lower() for line in f if line.strip() and not line.startswith('//')]
+        return cls(rules)
+
+    def public_suffix(self, host: str) -> str:
+        labels = host.split('.')
+        for i in range(len(labels)):
+            candidate = '.'.join(labels[i:])
+            if candidate in self.exceptions:
+                return '.'.join(labels[i + 1:])
+            parent = '.'.join(labels[i + 1:])
+            if candidate in self.rules or (parent and f"*.{parent}" in self.rules):
+                return candidate
+        return labels[-1]
+
+    def registered_domain(self, host: str) -> str:
+        suffix = self.public_suffix(host)
+        if len(suffix) >= len(host):
+            return host
+        return '.'.join(host.split('.')[-(suffix.count('.') + 2):])
+
+
+class DomainReputationIndex:
+
+    def __init__(self, trusted: Iterable[str], untrusted: Iterable[str],
+                 suffixes: Optional[PublicSuffixList] = None):
+        self.suffixes = suffixes if suffixes is not None else PublicSuffixList()
+        self.entries: Dict[str, int] = {}
+        for domain in trusted:
+            self.entries[domain] = TRUSTED
+        # An entry on both lists is treated as untrusted.
+        for domain in untrusted:
+            self.entries[domain] = UNTRUSTED
+        self.cache: Dict[str, Tuple[str, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @classmethod
+    def from_files(cls, trusted_path: str, untrusted_path: str,
+                   suffix_path: str = config.PUBLIC_SUFFIX_LIST_PATH) -> 'DomainReputationIndex':
+        return cls(read_domain_list(trusted_path), read_domain_list(untrusted_path),
+                   PublicSuffixList.from_file(suffix_path))
+
+    def lookup(self, host: str) -> Tuple[str, int]:
+        host = host.lower().strip('.').split(':', 1)[0]
+        result = self.cache.get(host)
+        if result is not None:
+            return result
+
+        registered = self.suffixes.registered_domain(host)
+        # Most specific entry wins: the host itself, its parents down to the registered
+        # domain, then public-suffix entries such as "edu" or "gov.uk".
+        labels = host.split('.')
+        reputation = 0
+        for i in range(len(labels)):
+            reputation = self.entries.get('.'.join(labels[i:]), 0)
+            if reputation:
+                break
+        result = (registered, reputation)
+        if len(self.cache) < config.DOMAIN_CACHE_MAX_HOSTS:
+            self.cache[host] = result
+        return result
+
+    def lookup_many(self, hosts: Iterable[str]) -> Tuple[np.ndarray, np.ndarray]:
+        codes, unique_hosts = pd.factorize(np.asarray(hosts, dtype=object))
+        results = [self.lookup(host) for host in unique_hosts]
+        registered = np.array([domain for domain, _ in results], dtype=object)
+        reputation = np.array([reputation for _, reputation in results], dtype=np.int8)
+        return registered[codes], reputation[codes]
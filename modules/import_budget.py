@@ -0,0 +1,44 @@
+import re
+import sys
+import argparse
+import subprocess
+from typing import List, Tuple
+import config
+
+IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure_import_time(module: str = "app") -> Tuple[float, List[Tuple[str, float]]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=config.PROJECT_ROOT
+    )
+    if result.returncode != 0:
+        raise ValueError(f"Error importing {module}: {result.stderr.strip().splitlines()[-1]}")
+
+    total = 0.0
+    imports = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match is None:
+            continue
+        cumulative = int(match.group(2)) / 1e6
+        imports.append((match.group(4), cumulative))
+        if len(match.group(3)) == 1:
+            total += cumulative
+    imports.sort(key=lambda item: item[1], reverse=True)
+    return total, imports
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure cold import time against the configured budget")
+    parser.add_argument("module", nargs="?", default="app")
+    parser.add_argument("--budget", type=float, default=config.IMPORT_TIME_BUDGET)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    total, imports = measure_import_time(args.module)
+    print(f"import {args.module}: {total:.2f}s (budget {args.budget:.2f}s)")
+    for name, seconds in imports[:args.top]:
+        print(f"  {seconds:8.3f}s  {name}")
+    sys.exit(0 if total <= args.budget else 1)
@@ -0,0 +1,121 @@
+import re
+import logging
+from typing import Dict, Hashable, Iterable, List, Tuple
+import numpy as np
+import pandas as pd
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+logger = logging.getLogger(__name__)
+
+
+def read_lexicon(path: str) -> Dict[str, List[str]]:
+    lexicon = {}
+    category = None
+    try:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                if line.startswith('[') and line.endswith(']'):
+                    category = line[1:-1].strip()
+                    lexicon.setdefault(category, [])
+                elif category is None:
+                    raise ValueError(f"phrase {line!r} appears before any [category] section")
+                else:
+                    lexicon[category].append(line.lower())
+    except (OSError, ValueError) as e:
+        raise ValueError(f"Error reading lexicon {path}: {str(e)}")
+    return lexicon
+
+
+class PhraseMatcher:
+
+    HIT_COLUMNS = ['row', 'phrase_id', 'category_id', 'rank']
+
+    def __init__(self, lexicon: Dict[Hashable, Iterable[str]]):
+        self.categories = list(lexicon)
+        phrase_ids = {}
+        entries = []
+        for category_id, phrases in enumerate(lexicon.values()):
+            for rank, phrase in enumerate(phrases):
+                phrase = phrase.lower()
+                if phrase:
+                    entries.append((phrase_ids.setdefault(phrase, len(phrase_ids)), category_id, rank))
+        self.phrases = list(phrase_ids)
+        self.phrase_array = np.array(self.phrases, dtype=object)
+        self.entries = pd.DataFrame(entries, columns=self.HIT_COLUMNS[1:]).drop_duplicates(['phrase_id', 'category_id'])
+        self.category_ids = {category: i for i, category in enumerate(self.categories)}
+
+        if ahocorasick is not None:
+            self.engine = 'ahocorasick'
+            self.automaton = ahocorasick.Automaton()
+            for phrase_id, phrase in enumerate(self.phrases):
+                self.automaton.add_word(phrase, phrase_id)
+            if self.phrases:
+                self.automaton.make_automaton()
+        else:
+            self.engine = 'regex'
+            self.pattern, self.prefixes = self._compile(self.phrases)
+
+    @staticmethod
+    def _compile(phrases: List[str]) -> Tuple[re.Pattern, Dict[str, List[int]]]:
+        trie = {}
+        prefixes = {}
+        for phrase_id, phrase in enumerate(phrases):
+            node = trie
+            for char in phrase:
+                node = node.setdefault(char, {})
+            node[''] = phrase_id
+        for phrase in phrases:
+            node, found = trie, []
+            for char in phrase:
+                node = node[char]
+                if '' in node:
+                    found.append(node[''])
+            prefixes[phrase] = found
+
+        def emit(node):
+            branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+            if not branches:
+                return ''
+            body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+            return f"(?:{body})?" if '' in node else body
+
+        # The lookahead reports the longest phrase starting at every offset; shorter
+        # phrases starting at the same offset are exactly its prefixes in the lexicon.
+        return re.compile(f"(?=({emit(trie)}))"), prefixes
+
+    def find(self, text: str) -> List[Tuple[str, Hashable]]:
+        hits = self.match(pd.Series([text], dtype=object))
+        return [(self.phrases[phrase_id], self.categories[category_id])
+                for phrase_id, category_id in zip(hits['phrase_id'], hits['category_id'])]
+
+    def match(self, texts: pd.Series) -> pd.DataFrame:
+        if not self.phrases or len(texts) == 0:
+            return pd.DataFrame({col: np.array([], dtype=np.int64) for col in self.HIT_COLUMNS})
+
+        if self.engine == 'ahocorasick':
+            rows, phrase_ids = [], []
+            for row, text in enumerate(texts):
+                for _, phrase_id in self.automaton.iter(text):
+                    rows.append(row)
+                    phrase_ids.append(phrase_id)
+            hits = pd.DataFrame({'row': np.array(rows, dtype=np.int64), 'phrase_id': np.array(phrase_ids, dtype=np.int64)})
+        else:
+            longest = pd.Series(np.asarray(texts, dtype=object)).str.findall(self.pattern).explode().dropna()
+            phrase_ids = longest.map(self.prefixes).explode()
+            hits = pd.DataFrame({'row': phrase_ids.index.to_numpy(dtype=np.int64),
+                                 'phrase_id': phrase_ids.to_numpy(dtype=np.int64)})
+
+        hits = hits.drop_duplicates().merge(self.entries, on='phrase_id')
+        return hits.sort_values(['row', 'category_id', 'rank'], ignore_index=True)[self.HIT_COLUMNS]
+
+    def present(self, hits: pd.DataFrame, n_rows: int) -> np.ndarray:
+        matrix = np.zeros((n_rows, len(self.categories)), dtype=bool)
+        matrix[hits['row'].to_numpy(), hits['category_id'].to_numpy()] = True
+        return matrix
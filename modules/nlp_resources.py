@@ -0,0 +1,82 @@
+import re
+import sys
+import logging
+import functools
+from typing import Callable, List, Optional
+import config
+
+logger = logging.getLogger(__name__)
+
+RESOURCES = {
+    'stopwords': 'corpora/stopwords',
+    'punkt': 'tokenizers/punkt',
+    'punkt_tab': 'tokenizers/punkt_tab',
+    'vader_lexicon': 'sentiment/vader_lexicon.zip',
+}
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+@functools.lru_cache(maxsize=None)
+def _nltk():
+    import nltk
+    if config.NLTK_DATA_DIR not in nltk.data.path:
+        nltk.data.path.insert(0, config.NLTK_DATA_DIR)
+    return nltk
+
+
+def has_resource(name: str) -> bool:
+    try:
+        _nltk().data.find(RESOURCES[name])
+        return True
+    except LookupError:
+        return False
+
+
+@functools.lru_cache(maxsize=None)
+def stopword_list() -> List[str]:
+    if has_resource('stopwords'):
+        from nltk.corpus import stopwords
+        return stopwords.words('english')
+    logger.warning(f"NLTK stopwords not found in {config.NLTK_DATA_DIR}; using scikit-learn's English list")
+    from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+    return sorted(ENGLISH_STOP_WORDS)
+
+
+@functools.lru_cache(maxsize=None)
+def _tokenizer() -> Callable[[str], List[str]]:
+    if has_resource('punkt_tab') or has_resource('punkt'):
+        from nltk.tokenize import word_tokenize
+        try:
+            word_tokenize("probe")
+            return word_tokenize
+        except LookupError:
+            pass
+    logger.warning(f"NLTK punkt not found in {config.NLTK_DATA_DIR}; using a regex tokenizer")
+    return TOKEN_PATTERN.findall
+
+
+def word_tokenize(text: str) -> List[str]:
+    return _tokenizer()(text)
+
+
+@functools.lru_cache(maxsize=None)
+def sentiment_analyzer():
+    if not has_resource('vader_lexicon'):
+        logger.warning(f"NLTK vader_lexicon not found in {config.NLTK_DATA_DIR}; sentiment scores default to neutral")
+        return None
+    from nltk.sentiment import SentimentIntensityAnalyzer
+    return SentimentIntensityAnalyzer()
+
+
+def provision(target_dir: Optional[str] = None) -> None:
+    nltk = _nltk()
+    target_dir = target_dir or config.NLTK_DATA_DIR
+    for name in RESOURCES:
+        nltk.download(name, download_dir=target_dir, quiet=True, raise_on_error=True)
+    logger.info(f"Downloaded NLTK resources to {target_dir}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    provision(sys.argv[1] if len(sys.argv) > 1 else None)
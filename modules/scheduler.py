@@ -0,0 +1,111 @@
+import time
+import threading
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor, wait, as_completed
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisScheduler:
+
+    def __init__(self, max_workers: int = config.SCHEDULER_WORKERS):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis")
+        self.futures: Dict[str, Future] = {}
+        self.running = set()
+        self.timings: Dict[str, float] = {}
+        self.lock = threading.Lock()
+
+    def submit(self, name: str, func: Callable[[], Any], depends_on: Iterable[str] = ()) -> Future:
+        with self.lock:
+            missing = [dep for dep in depends_on if dep not in self.futures]
+            if missing:
+                raise ValueError(f"Error scheduling {name}: unknown dependencies {missing}")
+            deps = [self.futures[dep] for dep in depends_on]
+            future = Future()
+            self.futures[name] = future
+
+        remaining = [len(deps)]
+
+        def on_dependency_done(_):
+            with self.lock:
+                remaining[0] -= 1
+                ready = remaining[0] == 0
+            if ready:
+                self._start(name, future, func, deps)
+
+        if not deps:
+            self._start(name, future, func, deps)
+        for dep in deps:
+            dep.add_done_callback(on_dependency_done)
+        return future
+
+    def _start(self, name: str, future: Future, func: Callable[[], Any], deps: List[Future]) -> None:
+        if future.cancelled():
+            return
+        failed = next((dep for dep in deps if dep.cancelled() or dep.exception() is not None), None)
+        if failed is not None:
+            future.set_exception(ValueError(f"Error running {name}: a dependency failed"))
+            return
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            with self.lock:
+                self.running.add(name)
+            started = time.perf_counter()
+            try:
+                result = func()
+            except Exception as e:
+                logger.warning(f"Background analysis {name} failed: {str(e)}")
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+            finally:
+                with self.lock:
+                    self.running.discard(name)
+                    self.timings[name] = time.perf_counter() - started
+
+        try:
+            self.executor.submit(run)
+        except RuntimeError as e:
+            future.set_exception(e)
+
+    def ready(self, name: str) -> bool:
+        future = self.futures.get(name)
+        return future is None or future.done()
+
+    def pending(self, names: Iterable[str]) -> List[str]:
+        return [name for name in names if not self.ready(name)]
+
+    def wait(self, names: Iterable[str], timeout: Optional[float] = None) -> None:
+        futures = [self.futures[name] for name in names if name in self.futures]
+        wait(futures, timeout=timeout)
+
+    def as_completed(self, names: Iterable[str]) -> Iterator[str]:
+        futures = {self.futures[name]: name for name in names if name in self.futures}
+        for future in as_completed(futures):
+            yield futures[future]
+
+    def result(self, name: str, timeout: Optional[float] = None) -> Any:
+        return self.futures[name].result(timeout=timeout)
+
+    def status(self) -> Dict[str, str]:
+        statuses = {}
+        with self.lock:
+            for name, future in self.futures.items():
+                if future.cancelled():
+                    statuses[name] = 'cancelled'
+                elif future.done():
+                    statuses[name] = 'failed' if future.exception() is not None else 'done'
+                else:
+                    statuses[name] = 'running' if name in self.running else 'pending'
+        return statuses
+
+    def shutdown(self) -> None:
+        with self.lock:
+            futures = list(self.futures.values())
+        for future in futures:
+            future.cancel()
+        self.executor.shutdown(wait=False)
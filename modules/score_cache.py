@@ -0,0 +1,119 @@
+import os
+import time
+import sqlite3
+import itertools
+import logging
+from contextlib import closing
+from typing import Tuple
+import numpy as np
+import pandas as pd
+import config
+from modules.credibility_factors import FLAGS_DTYPE, empty_details
+
+logger = logging.getLogger(__name__)
+
+
+class ScoreCache:
+
+    SCHEMA_VERSION = 3
+    LOOKUP_BATCH_ROWS = 100_000
+
+    def __init__(self, path: str = config.CREDIBILITY_CACHE_PATH, max_rows: int = config.CREDIBILITY_CACHE_MAX_ROWS):
+        self.path = path
+        self.max_rows = max_rows
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with closing(self._connect()) as con, con:
+            if con.execute("PRAGMA user_version").fetchone()[0] != self.SCHEMA_VERSION:
+                logger.info(f"Resetting credibility score cache {path} to schema version {self.SCHEMA_VERSION}")
+                con.execute("DROP TABLE IF EXISTS scores")
+                con.execute("DROP TABLE IF EXISTS factor_details")
+                con.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS scores ("
+                "content_hash INTEGER NOT NULL, ruleset TEXT NOT NULL, "
+                "score INTEGER NOT NULL, flags INTEGER NOT NULL, stored_at INTEGER NOT NULL, "
+                "PRIMARY KEY (ruleset, content_hash)) WITHOUT ROWID"
+            )
+            con.execute("CREATE INDEX IF NOT EXISTS scores_by_age ON scores (ruleset, stored_at)")
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS factor_details ("
+                "content_hash INTEGER NOT NULL, ruleset TEXT NOT NULL, seq INTEGER NOT NULL, "
+                "factor INTEGER NOT NULL, detail TEXT NOT NULL, "
+                "PRIMARY KEY (ruleset, content_hash, seq)) WITHOUT ROWID"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        con = sqlite3.connect(self.path, timeout=30)
+        con.execute("PRAGMA journal_mode=WAL")
+        return con
+
+    def lookup(self, hashes: np.ndarray, ruleset: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray, pd.DataFrame]:
+        keys = hashes.astype(np.uint64).view(np.int64)
+        found = np.zeros(len(keys), dtype=bool)
+        scores = np.zeros(len(keys), dtype=np.int8)
+        flags = np.zeros(len(keys), dtype=FLAGS_DTYPE)
+        positions = {key: i for i, key in enumerate(keys.tolist())}
+
+        with closing(self._connect()) as con:
+            con.execute("CREATE TEMP TABLE wanted (content_hash INTEGER PRIMARY KEY)")
+            for start in range(0, len(keys), self.LOOKUP_BATCH_ROWS):
+                con.executemany("INSERT OR IGNORE INTO wanted VALUES (?)",
+                                ((key,) for key in keys[start:start + self.LOOKUP_BATCH_ROWS].tolist()))
+            rows = con.execute(
+                "SELECT s.content_hash, s.score, s.flags FROM wanted w "
+                "JOIN scores s ON s.ruleset = ? AND s.content_hash = w.content_hash", (ruleset,)
+            )
+            for key, score, flag in rows:
+                i = positions[key]
+                found[i] = True
+                scores[i] = score
+                flags[i] = flag
+            detail_rows = con.execute(
+                "SELECT d.content_hash, d.factor, d.detail FROM wanted w "
+                "JOIN factor_details d ON d.ruleset = ? AND d.content_hash = w.content_hash "
+                "ORDER BY d.content_hash, d.seq", (ruleset,)
+            ).fetchall()
+
+        details = empty_details()
+        if detail_rows:
+            detail_keys, factor_ids, values = zip(*detail_rows)
+            details = pd.DataFrame({'row': np.array([positions[key] for key in detail_keys], dtype=np.int64),
+                                    'factor': np.array(factor_ids, dtype=np.int8),
+                                    'detail': np.array(values, dtype=object)})
+        return found, scores, flags, details
+
+    def store(self, hashes: np.ndarray, ruleset: str, scores: np.ndarray, flags: np.ndarray,
+              details: pd.DataFrame) -> None:
+        keys = hashes.astype(np.uint64).view(np.int64)
+        detail_keys = keys[details['row'].to_numpy()]
+        seq = details.groupby('row').cumcount().to_numpy()
+        with closing(self._connect()) as con, con:
+            if con.execute("SELECT 1 FROM scores WHERE ruleset = ? LIMIT 1", (ruleset,)).fetchone() is None:
+                # Scores from an older lexicon or config can never be looked up again.
+                removed = con.execute("DELETE FROM scores WHERE ruleset != ?", (ruleset,)).rowcount
+                con.execute("DELETE FROM factor_details WHERE ruleset != ?", (ruleset,))
+                if removed:
+                    logger.info(f"Dropped {removed} cached credibility scores from previous rulesets")
+            con.executemany(
+                "INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?, ?)",
+                zip(keys.tolist(), itertools.repeat(ruleset), scores.tolist(), flags.tolist(),
+                    itertools.repeat(time.time_ns()))
+            )
+            con.executemany(
+                "INSERT OR REPLACE INTO factor_details VALUES (?, ?, ?, ?, ?)",
+                zip(detail_keys.tolist(), itertools.repeat(ruleset), seq.tolist(),
+                    details['factor'].tolist(), details['detail'].astype(str).tolist())
+            )
+            self._trim(con, ruleset)
+        logger.info(f"Cached {len(keys)} credibility scores for ruleset {ruleset}")
+
+    def _trim(self, con: sqlite3.Connection, ruleset: str) -> None:
+        excess = con.execute("SELECT COUNT(*) FROM scores WHERE ruleset = ?", (ruleset,)).fetchone()[0] - self.max_rows
+        if excess <= 0:
+            return
+        con.execute("CREATE TEMP TABLE evicted AS SELECT content_hash FROM scores "
+                    "WHERE ruleset = ? ORDER BY stored_at LIMIT ?", (ruleset, excess))
+        con.execute("DELETE FROM scores WHERE ruleset = ? AND content_hash IN (SELECT content_hash FROM evicted)", (ruleset,))
+        con.execute("DELETE FROM factor_details WHERE ruleset = ? AND content_hash IN (SELECT content_hash FROM evicted)", (ruleset,))
+        con.execute("DROP TABLE evicted")
+        logger.info(f"Evicted the {excess} oldest cached credibility scores")
@@ -0,0 +1,86 @@
+import os
+import threading
+import logging
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+import numpy as np
+import pandas as pd
+import config
+from modules.nlp_resources import sentiment_analyzer
+
+logger = logging.getLogger(__name__)
+
+SENTIMENT_COLUMNS = ['compound', 'pos', 'neg', 'neu']
+NEUTRAL = np.array([0.0, 0.0, 0.0, 1.0], dtype=np.float32)
+
+
+def _polarity(texts: np.ndarray) -> np.ndarray:
+    sia = sentiment_analyzer()
+    values = np.empty((len(texts), len(SENTIMENT_COLUMNS)), dtype=np.float32)
+    for i, text in enumerate(texts):
+        scores = sia.polarity_scores(text)
+        values[i] = [scores[col] for col in SENTIMENT_COLUMNS]
+    return values
+
+
+class SentimentEngine:
+
+    def __init__(self, max_rows: int = config.SENTIMENT_MEMO_MAX_ROWS):
+        self.max_rows = max_rows
+        self.available = sentiment_analyzer() is not None
+        self.index = pd.Index(np.empty(0, dtype=np.uint64))
+        self.values = np.empty((0, len(SENTIMENT_COLUMNS)), dtype=np.float32)
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def score(self, texts: np.ndarray, workers: Optional[int] = config.SENTIMENT_WORKERS,
+              chunk_size: int = config.SENTIMENT_CHUNK_ROWS) -> pd.DataFrame:
+        texts = np.asarray(texts, dtype=object)
+        if not self.available:
+            return pd.DataFrame(np.tile(NEUTRAL, (len(texts), 1)), columns=SENTIMENT_COLUMNS)
+
+        codes, hashes = pd.factorize(pd.util.hash_array(texts))
+        values = np.empty((len(hashes), len(SENTIMENT_COLUMNS)), dtype=np.float32)
+        with self.lock:
+            positions = self.index.get_indexer(hashes)
+            known = positions >= 0
+            values[known] = self.values[positions[known]]
+        missing = np.flatnonzero(~known)
+
+        if len(missing):
+            first = np.unique(codes, return_index=True)[1][missing]
+            values[missing] = self._polarity(texts[first], workers, chunk_size)
+            with self.lock:
+                if len(self.index) + len(missing) > self.max_rows:
+                    logger.info(f"Sentiment memo reached {self.max_rows} texts; clearing it")
+                    self.index = self.index[:0]
+                    self.values = self.values[:0]
+                new = ~self.index.isin(hashes[missing])
+                self.index = self.index[new].append(pd.Index(hashes[missing]))
+                self.values = np.concatenate([self.values[new], values[missing]])
+
+        return pd.DataFrame(values[codes], columns=SENTIMENT_COLUMNS)
+
+    def _polarity(self, texts: np.ndarray, workers: Optional[int], chunk_size: int) -> np.ndarray:
+        workers = workers or os.cpu_count() or 1
+        if workers <= 1 or len(texts) <= chunk_size:
+            return _polarity(texts)
+
+        starts = range(0, len(texts), chunk_size)
+        logger.info(f"Scoring sentiment of {len(texts)} texts in {len(starts)} chunks with {workers} workers")
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            return np.concatenate(list(executor.map(_polarity, [texts[start:start + chunk_size] for start in starts])))
+
+
+@functools.lru_cache(maxsize=None)
+def get_sentiment_engine() -> SentimentEngine:
+    return SentimentEngine()
+
+
+def sentiment_texts(title: pd.Series, text: pd.Series) -> pd.Series:
+    return (title.fillna('').astype(str) + ' ' + text.fillna('').astype(str)).str.lower()
@@ -1,51 +1,69 @@
 import pandas as pd
 import numpy as np
-from wordcloud import WordCloud
 import re
 from collections import Counter
-import nltk
-from nltk.corpus import stopwords
-
-try:
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('stopwords', quiet=True)
+from modules.derived_columns import features_for
+from modules.agent_cache import memoized, clear_results
+from modules.nlp_resources import stopword_list
 
 class StatsAgent:
  
-    def __init__(self, df: pd.DataFrame):
+    def __init__(self, df: pd.DataFrame, store=None):
         self.df = df
+        self.store = store
         self._initialize_stopwords()
     
     def _initialize_stopwords(self):
-        self.stop_words = set(stopwords.words('english'))
+        self.stop_words = set(stopword_list())
         # Add Reddit-specific stopwords
         reddit_stopwords = {'amp', 'x200b', 'https', 'http', 'www', 'com', 
                            'reddit', 'like', 'just', 'post', 'get', 'would'}
         self.stop_words.update(reddit_stopwords)
     
+    def on_new_rows(self, df: pd.DataFrame, new_rows: pd.DataFrame) -> None:
+        self.df = df
+        clear_results(self)
+    
+    def get_post_count(self) -> int:
+        if self.store is not None:
+            return len(self.store)
+        return len(self.df)
+    
+    @memoized
     def get_unique_subreddit_count(self) -> int:
+        if self.store is not None:
+            return len(self.store.counts_by('subreddit'))
         return self.df['subreddit'].nunique()
     
+    @memoized
     def get_average_score(self) -> float:
+        if self.store is not None:
+            return self.store.average_score()
         return self.df['score'].mean()
     
+    def _counts_by(self, name: str) -> pd.Series:
+        if self.store is not None:
+            return self.store.counts_by(name)
+        return self.df.groupby(features_for(self.df)[name]).size()
+    
+    @memoized
     def get_subreddit_distribution(self) -> pd.DataFrame:
-        subreddit_counts = self.df['subreddit'].value_counts().reset_index()
+        if self.store is not None:
+            subreddit_counts = self.store.counts_by('subreddit').sort_values(ascending=False).reset_index()
+        else:
+            subreddit_counts = self.df['subreddit'].value_counts().reset_index()
         subreddit_counts.columns = ['subreddit', 'count']
         return subreddit_counts
     
+    @memoized
     def get_posts_over_time(self) -> dict:
-        posts_by_day = self.df.groupby('date').size().reset_index(name='count')
+        posts_by_day = self._counts_by('date').reset_index(name='count')
 
-        self.df['week'] = self.df['created_date'].dt.isocalendar().week
-        self.df['year_week'] = self.df['created_date'].dt.strftime('%Y-%U')
-        posts_by_week = self.df.groupby('year_week').size().reset_index(name='count')
-        posts_by_week['date'] = pd.to_datetime(posts_by_week['year_week'] + '-0', format='%Y-%U-%w')
+        posts_by_week = self._counts_by('week_start').reset_index(name='count')
+        posts_by_week = posts_by_week.rename(columns={'week_start': 'date'})
 
-        self.df['year_month'] = self.df['created_date'].dt.strftime('%Y-%m')
-        posts_by_month = self.df.groupby('year_month').size().reset_index(name='count')
-        posts_by_month['date'] = pd.to_datetime(posts_by_month['year_month'] + '-01', format='%Y-%m-%d')
+        posts_by_month = self._counts_by('month_start').reset_index(name='count')
+        posts_by_month = posts_by_month.rename(columns={'month_start': 'date'})
         
         return {
             'day': posts_by_day,
@@ -53,22 +71,47 @@ class StatsAgent:
             'month': posts_by_month[['date', 'count']]
         }
     
+    @memoized
     def get_posts_by_day_of_week(self) -> pd.DataFrame:
         day_names = {
             0: 'Monday', 1: 'Tuesday', 2: 'Wednesday', 3: 'Thursday',
             4: 'Friday', 5: 'Saturday', 6: 'Sunday'
         }
         
-        posts_by_dow = self.df.groupby('day_of_week').size().reset_index(name='count')
+        posts_by_dow = self._counts_by('day_of_week').reset_index(name='count')
         posts_by_dow['day_name'] = posts_by_dow['day_of_week'].map(day_names)
         posts_by_dow = posts_by_dow.sort_values('day_of_week')
         
         return posts_by_dow
     
+    @memoized
     def get_posts_by_hour(self) -> pd.DataFrame:
-        posts_by_hour = self.df.groupby('hour').size().reset_index(name='count')
+        posts_by_hour = self._counts_by('hour').reset_index(name='count')
         return posts_by_hour
     
+    @memoized
+    def get_sentiment_over_time(self, period: str = 'week', top_n: int = 8) -> pd.DataFrame:
+        features = features_for(self.df)
+        date_feature = {'day': 'date', 'week': 'week_start', 'month': 'month_start'}[period]
+        compound = features['sentiment_compound']
+        frame = pd.DataFrame({
+            'date': features[date_feature],
+            'subreddit': self.df['subreddit'],
+            'compound': compound,
+            'positive': (compound >= 0.05).astype(np.float32),
+            'negative': (compound <= -0.05).astype(np.float32)
+        })
+        top_subreddits = self.df['subreddit'].value_counts().head(top_n).index
+        frame = frame[frame['subreddit'].isin(top_subreddits)]
+        sentiment = frame.groupby(['date', 'subreddit'], observed=True).agg(
+            compound=('compound', 'mean'),
+            positive=('positive', 'mean'),
+            negative=('negative', 'mean'),
+            posts=('compound', 'size')
+        ).reset_index()
+        sentiment['subreddit'] = sentiment['subreddit'].astype(str)
+        return sentiment
+    
     def _clean_text(self, text: str) -> str:
         if not isinstance(text, str):
             return ""
@@ -81,7 +124,9 @@ class StatsAgent:
         
         return ' '.join(words)
     
-    def generate_title_wordcloud(self) -> WordCloud:
+    @memoized
+    def generate_title_wordcloud(self) -> 'WordCloud':
+        from wordcloud import WordCloud
         cleaned_titles = self.df['title'].astype(str).apply(self._clean_text)
         all_text = ' '.join(cleaned_titles)
         
@@ -95,6 +140,7 @@ class StatsAgent:
         
         return wordcloud
     
+    @memoized
     def get_top_keywords_in_titles(self, n: int = 20) -> pd.DataFrame:
 
         cleaned_titles = self.df['title'].astype(str).apply(self._clean_text)
@@ -2,6 +2,7 @@ import pandas as pd
 from typing import List, Dict, Any
 import numpy as np
 from datetime import datetime
+from modules.agent_cache import memoized, clear_results
 
 class SummaryAgent:
     def __init__(self, df: pd.DataFrame, stats_agent=None, topic_agent=None):
@@ -9,6 +10,11 @@ class SummaryAgent:
         self.stats_agent = stats_agent
         self.topic_agent = topic_agent
     
+    def on_new_rows(self, df: pd.DataFrame, new_rows: pd.DataFrame) -> None:
+        self.df = df
+        clear_results(self)
+    
+    @memoized
     def generate_summary(self) -> str:
         summary_parts = []
         total_posts = len(self.df)
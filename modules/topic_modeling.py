@@ -1,36 +1,27 @@
 import pandas as pd
-from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
-from sklearn.decomposition import LatentDirichletAllocation, NMF
 import numpy as np
 from typing import List, Tuple, Dict, Any
-import nltk
-from nltk.corpus import stopwords
-
-try:
-    nltk.data.find('corpora/stopwords')
-except LookupError:
-    nltk.download('stopwords', quiet=True)
+from modules.derived_columns import features_for
+from modules.agent_cache import memoized, clear_results
+from modules.nlp_resources import stopword_list
 
 class TopicModelAgent:
     
     def __init__(self, df: pd.DataFrame):
         self.df = df
-        self._prepare_text_data()
-        self.stop_words = list(stopwords.words('english'))
+        self.stop_words = list(stopword_list())
         reddit_stopwords = ['amp', 'x200b', 'https', 'http', 'www', 'com', 
                            'reddit', 'like', 'just', 'post', 'get', 'would']
         self.stop_words.extend(reddit_stopwords)
     
-    def _prepare_text_data(self):
-        if 'selftext' in self.df.columns:
-            self.df['combined_text'] = self.df['title'] + ' ' + self.df['selftext'].fillna('')
-        else:
-            self.df['combined_text'] = self.df['title']
-        
-        self.df['combined_text'] = self.df['combined_text'].astype(str)
+    def on_new_rows(self, df: pd.DataFrame, new_rows: pd.DataFrame) -> None:
+        self.df = df
+        clear_results(self)
     
-    def generate_topics(self, n_topics: int = 5, method: str = 'lda') -> List[Tuple[int, List[str], List[str]]]:
-
+    @memoized
+    def _document_term_matrix(self):
+        from sklearn.feature_extraction.text import CountVectorizer
+        
         vectorizer = CountVectorizer(
             stop_words='english',
             max_df=0.95,
@@ -38,8 +29,15 @@ class TopicModelAgent:
             max_features=10000
         )
         
-        X = vectorizer.fit_transform(self.df['combined_text'])
-        feature_names = vectorizer.get_feature_names_out()
+        X = vectorizer.fit_transform(features_for(self.df)['combined_text'])
+        return X, vectorizer.get_feature_names_out()
+    
+    @memoized
+    def generate_topics(self, n_topics: int = 5, method: str = 'lda') -> List[Tuple[int, List[str], List[str]]]:
+
+        from sklearn.decomposition import LatentDirichletAllocation, NMF
+        
+        X, feature_names = self._document_term_matrix()
         if method == 'nmf':
             model = NMF(n_components=n_topics, random_state=42)
         else:
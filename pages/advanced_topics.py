@@ -1,9 +1,11 @@
 import streamlit as st
 import plotly.express as px
 import pandas as pd
+import data_processing
 from visualization_helpers import render_custom_insight_box
+from utils import fragment
 
-def render(df, advanced_agent, gemini_agent):
+def render(df, advanced_agent, gemini_agent, dataset_key):
     st.header("Advanced Topic Analysis")
     
     topic_data = advanced_agent._generate_simple_topics(n_topics=5)
@@ -19,15 +21,18 @@ def render(df, advanced_agent, gemini_agent):
     subreddit = None if selected_subreddit == "All Subreddits" else selected_subreddit
     
     if subreddit:
-        subreddit_df = df[df['subreddit'] == subreddit]
-        if len(subreddit_df) >= 20:  # Ensure we have enough data
-            subreddit_agent = advanced_agent.__class__(subreddit_df)
+        subreddit_agent = data_processing.subreddit_agent(dataset_key, advanced_agent, subreddit)
+        if len(subreddit_agent.df) >= 20:  # Ensure we have enough data
             topic_data = subreddit_agent._generate_simple_topics(n_topics=3)
     
     with st.spinner("Generating topic insights..."):
         summary = gemini_agent.generate_topic_summary(topic_data, subreddit)
         render_custom_insight_box(summary, title="AI Topic Analysis", icon="🤖")
     
+    render_keyword_trends(advanced_agent)
+
+@fragment
+def render_keyword_trends(advanced_agent):
     st.subheader("Keyword Trend Detection")
     
     time_window = st.selectbox(
@@ -1,17 +1,20 @@
 import streamlit as st
 import pandas as pd
-from modules.stats_analysis import StatsAgent
+import data_processing
 from visualization_helpers import render_custom_insight_box
 
 def render_ai_summary_box(title, summary):
     st.markdown(f"**🤖 {title}**")
     st.markdown(summary)
 
-def render(df, stats_agent, advanced_agent, gemini_agent, summary_agent):
+def render(df, stats_agent, advanced_agent, gemini_agent, summary_agent, dataset_key):
     st.header("AI-Generated Insights")
     
-    if gemini_agent.has_valid_key:
+    gemini_status = gemini_agent.status
+    if gemini_status == 'connected':
         st.success("✅ Connected to Google Gemini API")
+    elif gemini_status in ('unchecked', 'checking'):
+        st.info("Checking the Google Gemini API connection in the background...")
     else:
         st.warning("""
         ⚠️ No valid Gemini API key found. Add your API key to the .env file:
@@ -57,9 +60,8 @@ def render(df, stats_agent, advanced_agent, gemini_agent, summary_agent):
         subreddit = None if selected_subreddit == "All Subreddits" else selected_subreddit
         
         if subreddit:
-            subreddit_df = df[df['subreddit'] == subreddit]
-            if len(subreddit_df) > 0:
-                subreddit_stats = StatsAgent(subreddit_df)
+            subreddit_stats = data_processing.subreddit_agent(dataset_key, stats_agent, subreddit)
+            if len(subreddit_stats.df) > 0:
                 time_data = subreddit_stats.get_posts_over_time()['day']
         
         with st.spinner("Generating AI summary..."):
@@ -80,9 +82,8 @@ def render(df, stats_agent, advanced_agent, gemini_agent, summary_agent):
         subreddit = None if selected_subreddit == "All Subreddits" else selected_subreddit
         
         if subreddit:
-            subreddit_df = df[df['subreddit'] == subreddit]
-            if len(subreddit_df) >= 20:  # Ensure we have enough data
-                subreddit_agent = advanced_agent.__class__(subreddit_df)
+            subreddit_agent = data_processing.subreddit_agent(dataset_key, advanced_agent, subreddit)
+            if len(subreddit_agent.df) >= 20:  # Ensure we have enough data
                 topic_data = subreddit_agent.generate_topics(n_topics=3)
         
         with st.spinner("Generating topic insights..."):
@@ -108,5 +109,5 @@ def render(df, stats_agent, advanced_agent, gemini_agent, summary_agent):
             filtered_cred_df = credibility_df
         
         with st.spinner("Generating credibility insights..."):
-            summary = gemini_agent.generate_misinformation_summary(filtered_cred_df)
+            summary = gemini_agent.generate_misinformation_summary(filtered_cred_df, advanced_agent.explain_credibility, subreddit)
             render_custom_insight_box(summary, title="AI Credibility Analysis", icon="🤖")
\ No newline at end of file
@@ -84,6 +84,7 @@ def render(df, advanced_agent):
             st.subheader("Posts with Low Credibility Scores")
             
             low_cred_posts = credibility_df.sort_values('credibility_score').head(5)
+            low_cred_posts = low_cred_posts.assign(credibility_factors=advanced_agent.explain_credibility(low_cred_posts))
             
             for _, post in low_cred_posts.iterrows():
                 with st.expander(f"{post['title']}"):
@@ -94,6 +95,22 @@ def render(df, advanced_agent):
                         int(post['credibility_score']),
                         post['credibility_factors']
                     )
+            
+            breakdown = advanced_agent.credibility_factor_breakdown('subreddit')
+            if not breakdown.empty:
+                st.subheader("Credibility Factors by Subreddit")
+                
+                top = breakdown.nlargest(10, 'posts')
+                shares = top.drop(columns='posts').div(top['posts'], axis=0) * 100
+                shares = shares.loc[:, shares.max() > 0]
+                fig = px.imshow(
+                    shares.round(1),
+                    labels=dict(x="Factor", y="Subreddit", color="% of Posts"),
+                    color_continuous_scale="Blues",
+                    aspect="auto",
+                    text_auto=True
+                )
+                st.plotly_chart(fig, use_container_width=True)
             with st.expander("How credibility scores are calculated"):
                 st.markdown("""
                 ### Credibility Scoring Methodology
@@ -10,7 +10,7 @@ def render(df, stats_agent, advanced_agent):
     
     col1, col2, col3 = st.columns(3)
     with col1:
-        render_metric_card("Total Posts", f"{len(df):,}")
+        render_metric_card("Total Posts", f"{stats_agent.get_post_count():,}")
     with col2:
         render_metric_card("Total Subreddits", f"{stats_agent.get_unique_subreddit_count():,}")
     with col3:
@@ -21,7 +21,7 @@ def render(df, stats_agent, advanced_agent):
     subreddit_counts = stats_agent.get_subreddit_distribution()
     top_subreddit = subreddit_counts.iloc[0]['subreddit']
     top_count = subreddit_counts.iloc[0]['count']
-    top_percent = (top_count / len(df)) * 100
+    top_percent = (top_count / stats_agent.get_post_count()) * 100
     
     fig = px.bar(
         subreddit_counts.head(10),
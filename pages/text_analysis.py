@@ -3,8 +3,10 @@ import plotly.express as px
 import matplotlib.pyplot as plt
 import pandas as pd
 from visualization_helpers import render_insight_box, generate_category_insight
+from utils import fragment
+import config
 
-def render(df, stats_agent):
+def render(df, stats_agent, topic_agent):
     st.header("Text Analysis")
      
     st.subheader("Word Cloud of Post Titles")
@@ -59,15 +61,15 @@ def render(df, stats_agent):
         st.write(f"Found {len(filtered_posts)} posts containing '{search_term}'")
         st.dataframe(filtered_posts[['title', 'subreddit', 'score', 'created_date']])
     
+    render_topic_model(topic_agent)
+
+@fragment
+def render_topic_model(topic_agent):
     st.subheader("Basic Topic Modeling")
     
-    import config
-    from modules.topic_modeling import TopicModelAgent
-    
     n_topics = st.slider("Number of Topics", min_value=2, max_value=config.MAX_TOPICS, value=config.DEFAULT_TOPICS)
     
     with st.spinner("Generating topic model..."):
-        topic_agent = TopicModelAgent(df)
         topics = topic_agent.generate_topics(n_topics=n_topics)
     
     for i, (topic_id, words, docs) in enumerate(topics):
@@ -112,6 +112,36 @@ def render(df, stats_agent):
         The pattern shows {peak_pattern}, suggesting {'users engage both before and after work hours' if peak_pattern == 'both morning and evening peaks' else 'users are most active during evening leisure hours' if peak_pattern == 'primarily evening activity' else 'users tend to post early in the day'}.
         """
         render_insight_box(insight_text)
+    st.subheader("Sentiment by Subreddit")
+    sentiment_data = stats_agent.get_sentiment_over_time(time_agg.lower())
+    if sentiment_data.empty:
+        st.info("No sentiment data available.")
+    else:
+        fig = px.line(
+            sentiment_data,
+            x="date",
+            y="compound",
+            color="subreddit",
+            title=f"Average Sentiment by {time_agg} (most active subreddits)",
+            markers=True,
+            hover_data={"positive": ":.0%", "negative": ":.0%", "posts": True}
+        )
+        fig.update_layout(
+            yaxis_title="Mean VADER compound score",
+            yaxis=dict(range=[-1, 1]),
+            hovermode="x unified"
+        )
+        st.plotly_chart(fig, use_container_width=True)
+        
+        weighted = sentiment_data['compound'] * sentiment_data['posts']
+        overall = (weighted.groupby(sentiment_data['subreddit']).sum()
+                   / sentiment_data.groupby('subreddit')['posts'].sum()).sort_values()
+        insight_text = f"""
+        **Interpretation:** Lines show the average sentiment of posts in the most active subreddits, from -1 (negative) to +1 (positive).
+        **r/{overall.index[-1]}** is the most positive overall ({overall.iloc[-1]:+.2f}), while **r/{overall.index[0]}** is the most negative ({overall.iloc[0]:+.2f}).
+        """
+        render_insight_box(insight_text)
+    
     st.markdown("""
     <style>
     /* Reset any custom styling that might affect text color */
@@ -0,0 +1,25 @@
+import json
+import pytest
+
+
+def write_posts(path, posts, bad_lines=0):
+    with open(path, 'a', encoding='utf-8') as f:
+        for post in posts:
+            f.write(json.dumps({'kind': 't3', 'data': post}) + '\n')
+        for _ in range(bad_lines):
+            f.write('{not json\n')
+
+
+def make_post(i, retrieved_on=100, score=1, name=None, **fields):
+    post = {
+        'id': f"p{i}", 'name': name or f"t3_p{i}", 'subreddit': 'test', 'title': f"post {i}",
+        'selftext': '', 'author': 'someone', 'score': score, 'created_utc': 1_700_000_000 + i,
+        'retrieved_on': retrieved_on
+    }
+    post.update(fields)
+    return post
+
+
+@pytest.fixture
+def posts_file(tmp_path):
+    return str(tmp_path / 'posts.jsonl')
@@ -0,0 +1,39 @@
+import pandas as pd
+from modules.ai_summary import GeminiSummaryAgent
+
+
+class _FakeModel:
+
+    def __init__(self):
+        self.prompts = []
+
+    def generate_content(self, prompt):
+        self.prompts.append(prompt)
+        return type('Response', (), {'text': f"summary {len(self.prompts)}"})()
+
+
+def _agent():
+    agent = GeminiSummaryAgent(api_key='test-key')
+    agent._set_status('connected', _FakeModel())
+    return agent
+
+
+def _days(counts):
+    return pd.DataFrame({'date': pd.date_range('2024-01-01', periods=len(counts)), 'count': counts})
+
+
+def test_summaries_are_keyed_by_the_rows_summarised():
+    agent = _agent()
+    first = agent.generate_time_series_summary(_days([1, 5, 2]))
+    assert agent.generate_time_series_summary(_days([1, 5, 2])) == first
+    assert agent.generate_time_series_summary(_days([1, 5, 2, 9])) != first
+    assert len(agent.model.prompts) == 2
+
+
+def test_credibility_summary_depends_on_subreddit_filter():
+    agent = _agent()
+    df = pd.DataFrame({'title': ['a', 'b', 'c'], 'subreddit': ['x', 'x', 'y'], 'credibility_score': [10, 80, 20]})
+    everything = agent.generate_misinformation_summary(df)
+    filtered = agent.generate_misinformation_summary(df[df['subreddit'] == 'x'], subreddit='x')
+    assert everything != filtered
+    assert agent.generate_misinformation_summary(df) == everything
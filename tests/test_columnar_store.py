@@ -0,0 +1,49 @@
+import pytest
+from modules.columnar_store import ColumnarStore, pyarrow
+from modules.data_ingestion import DataIngestionAgent
+from conftest import make_post, write_posts
+
+pytestmark = pytest.mark.skipif(pyarrow is None, reason="pyarrow is required for the out-of-core store")
+
+
+def _duplicated_posts():
+    posts = [make_post(i) for i in range(20)]
+    # Newer copies of posts 3 and 7, one arriving before the original.
+    return [make_post(3, retrieved_on=300, score=30)] + posts + [make_post(7, retrieved_on=200, score=70)]
+
+
+def _rows(df):
+    return sorted(zip(df['name'], df['score'].astype(int)))
+
+
+def test_exact_dedup_matches_ingestion_and_keeps_newest(posts_file, tmp_path):
+    write_posts(posts_file, _duplicated_posts())
+    store = ColumnarStore.for_file(posts_file, str(tmp_path / 'store'), dedup='exact')
+    sample = store.sample()
+    expected = DataIngestionAgent(posts_file, dedup='exact', workers=1).get_dataframe()
+
+    assert len(store) == 20
+    assert _rows(sample) == _rows(expected)
+    assert dict(_rows(sample))['t3_p3'] == 30
+    assert dict(_rows(sample))['t3_p7'] == 70
+
+
+def test_off_keeps_every_post(posts_file, tmp_path):
+    write_posts(posts_file, _duplicated_posts())
+    store = ColumnarStore.for_file(posts_file, str(tmp_path / 'store'), dedup='off')
+    assert len(store) == 22
+
+
+def test_bloom_keeps_first_copy(posts_file, tmp_path):
+    write_posts(posts_file, _duplicated_posts())
+    store = ColumnarStore.for_file(posts_file, str(tmp_path / 'store'), dedup='bloom')
+    rows = dict(_rows(store.sample()))
+    assert len(store) == 20
+    assert rows['t3_p3'] == 30
+    assert rows['t3_p7'] == 1
+
+
+def test_store_key_covers_dedup_mode(posts_file):
+    write_posts(posts_file, [make_post(1)])
+    assert ColumnarStore.store_key(posts_file, 'exact') != ColumnarStore.store_key(posts_file, 'off')
+    assert ColumnarStore.store_key(posts_file, 'exact') == ColumnarStore.store_key(posts_file, 'exact')
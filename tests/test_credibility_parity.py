@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+from data_processing import generate_synthetic_data
+from modules.credibility_analyzer import CredibilityAnalyzer
+from modules.credibility_factors import decode_factors
+
+EDGE_CASES = [
+    ("BREAKING NEWS!!", "according to a study at https://www.nature.com/articles/1 and nih.gov", 150),
+    ("Is this a conspiracy??", "see https://infowars.com/a https://naturalnews.com/b and rumble.com", -3),
+    ("ok", "", 0),
+    (None, None, 5),
+    ("Education matters", "my education at example.edu and news.bbc.co.uk", 10),
+    ("Spoofed", "visit rumble.com.evil.io or https://rumble.com.evil.io/x", 1),
+    ("Long post", "however the evidence shows " * 40, 99),
+    ("I absolutely love this wonderful amazing fantastic day", "best ever, so happy and grateful", 101),
+]
+
+
+@pytest.fixture(scope='module')
+def posts():
+    edge = pd.DataFrame(EDGE_CASES, columns=['title', 'selftext', 'score'])
+    synthetic = generate_synthetic_data(300)[['title', 'selftext', 'score']]
+    df = pd.concat([edge, synthetic, edge], ignore_index=True)
+    analyzer = CredibilityAnalyzer(jitter='off', cache_path=None)
+    expected = []
+    for title, text, score in df.itertuples(index=False):
+        credibility_score, factors = analyzer.analyze_post(title, text, score)
+        expected.append((credibility_score, ', '.join(factors) if factors else "No specific factors detected"))
+    return df, expected
+
+
+def _assert_parity(df, expected, scores, details):
+    factors = decode_factors(scores['credibility_flags'], details)
+    actual = list(zip(scores['credibility_score'].astype(int), factors))
+    mismatches = [(i, want, got) for i, (want, got) in enumerate(zip(expected, actual)) if want != got]
+    assert not mismatches, mismatches[:3]
+
+
+def test_batch_matches_analyze_post(posts):
+    df, expected = posts
+    analyzer = CredibilityAnalyzer(jitter='off', cache_path=None)
+    _assert_parity(df, expected, *analyzer.batch_analyze_posts(df, workers=1))
+
+
+def test_cached_batch_matches_analyze_post(posts, tmp_path):
+    df, expected = posts
+    analyzer = CredibilityAnalyzer(jitter='off', cache_path=str(tmp_path / 'scores.sqlite'))
+    analyzer.batch_analyze_posts(df, workers=1)
+    _assert_parity(df, expected, *analyzer.batch_analyze_posts(df, workers=1))
+
+
+def test_parallel_batch_matches_analyze_post(posts):
+    df, expected = posts
+    analyzer = CredibilityAnalyzer(jitter='off', cache_path=None)
+    _assert_parity(df, expected, *analyzer.batch_analyze_posts(df, workers=2, chunk_size=100))
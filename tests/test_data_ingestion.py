@@ -0,0 +1,43 @@
+import pytest
+import config
+from modules.data_ingestion import DataIngestionAgent
+from conftest import make_post, write_posts
+
+
+def _scores(agent):
+    df = agent.get_dataframe()
+    return sorted(zip(df['name'], df['score']))
+
+
+@pytest.fixture
+def duplicated_posts(posts_file):
+    write_posts(posts_file, [make_post(0), make_post(1, retrieved_on=300, score=30)])
+    write_posts(posts_file, [make_post(1, retrieved_on=200, score=20), make_post(0, retrieved_on=400, score=40)])
+    return posts_file
+
+
+def test_exact_dedup_keeps_the_newest_copy(duplicated_posts):
+    agent = DataIngestionAgent(duplicated_posts, dedup='exact', workers=1)
+    assert _scores(agent) == [('t3_p0', 40), ('t3_p1', 30)]
+    assert agent.duplicates_dropped == 2
+
+
+def test_bloom_dedup_keeps_the_first_copy(duplicated_posts):
+    agent = DataIngestionAgent(duplicated_posts, dedup='bloom', workers=1)
+    assert _scores(agent) == [('t3_p0', 1), ('t3_p1', 30)]
+
+
+def test_dedup_off_keeps_every_copy(duplicated_posts):
+    agent = DataIngestionAgent(duplicated_posts, dedup='off', workers=1)
+    assert len(agent.get_dataframe()) == 4
+
+
+def test_sharded_bad_lines_are_totalled(posts_file, monkeypatch):
+    for batch in range(3):
+        write_posts(posts_file, [make_post(batch * 100 + i) for i in range(100)], bad_lines=2)
+    monkeypatch.setattr(config, 'PARALLEL_INGEST_MIN_BYTES', 0)
+
+    agent = DataIngestionAgent(posts_file, dedup='off', workers=3)
+    assert len(agent.bad_lines_per_shard) == 3
+    assert agent.bad_lines == sum(agent.bad_lines_per_shard) == 6
+    assert len(agent.get_dataframe()) == 300
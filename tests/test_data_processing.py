@@ -0,0 +1,58 @@
+import types
+import config
+import data_processing
+from modules.dataset_cache import DatasetCache
+from conftest import make_post, write_posts
+
+
+def test_out_of_core_key_does_not_hash_the_file(posts_file, monkeypatch):
+    write_posts(posts_file, [make_post(i) for i in range(5)])
+    monkeypatch.setattr(config, 'DEMO_DATA_PATH', posts_file)
+    monkeypatch.setattr(data_processing, '_build_agents',
+                        lambda *args: {'key': args[-1], 'scheduler': types.SimpleNamespace(shutdown=lambda: None)})
+
+    def fail(*args, **kwargs):
+        raise AssertionError("out-of-core datasets must not be fingerprinted by content")
+
+    monkeypatch.setattr(DatasetCache, 'fingerprint', fail)
+    agents = data_processing.load_agents(use_demo_data=True, out_of_core=True)
+    assert agents['key'].startswith('store:')
+    data_processing.agent_cache.discard(agents['key'])
+
+
+def test_followed_frame_replaces_its_store_entry(posts_file, monkeypatch):
+    write_posts(posts_file, [make_post(i) for i in range(10)])
+    monkeypatch.setattr(config, 'DEMO_DATA_PATH', posts_file)
+    key = data_processing.follow_key(posts_file)
+    try:
+        agents = data_processing.load_agents(use_demo_data=True, follow=True, session_id='s')
+        assert data_processing.dataset_store.get(key) is agents['df']
+
+        write_posts(posts_file, [make_post(i) for i in range(10, 15)])
+        agents = data_processing.load_agents(use_demo_data=True, follow=True, session_id='s')
+        stored = data_processing.dataset_store.get(key)
+        assert stored is agents['df']
+        assert len(stored) == 15
+        assert data_processing.dataset_store.sizes[key] == int(stored.memory_usage(deep=True).sum())
+        assert data_processing.dataset_store.refcount(key) == 1
+    finally:
+        data_processing.dataset_store.release('s')
+        data_processing.agent_cache.discard(key)
+        data_processing.followed_files.pop(posts_file, None)
+
+
+def test_subreddit_agents_are_shared_until_the_frame_changes():
+    from modules.stats_analysis import StatsAgent
+    df = data_processing.generate_synthetic_data(n_posts=200, seed=1)
+    agent = StatsAgent(df)
+    subreddit = df['subreddit'].iloc[0]
+    try:
+        first = data_processing.subreddit_agent('test', agent, subreddit)
+        assert data_processing.subreddit_agent('test', agent, subreddit) is first
+        assert (first.df['subreddit'] == subreddit).all()
+        assert len(first.df) == (df['subreddit'] == subreddit).sum()
+
+        agent.on_new_rows(df.copy(), df.iloc[:0])
+        assert data_processing.subreddit_agent('test', agent, subreddit) is not first
+    finally:
+        data_processing.agent_cache.discard(('test', 'StatsAgent', subreddit))
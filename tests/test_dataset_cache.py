@@ -0,0 +1,10 @@
+import io
+from modules.dataset_cache import DatasetCache
+
+
+def test_fingerprint_covers_ingest_settings():
+    source = io.BytesIO(b'{"id": "a", "title": "post"}\n')
+    exact = DatasetCache.fingerprint(source, ('exact', ('id', 'title')))
+    assert DatasetCache.fingerprint(source, ('exact', ('id', 'title'))) == exact
+    assert DatasetCache.fingerprint(source, ('off', ('id', 'title'))) != exact
+    assert DatasetCache.fingerprint(source, ('exact', None)) != exact
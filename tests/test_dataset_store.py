@@ -0,0 +1,45 @@
+import gc
+import weakref
+import pandas as pd
+from modules.dataset_store import DatasetStore
+from modules.derived_columns import features_for
+
+
+def _frame(n=50):
+    return pd.DataFrame({'title': ['post'] * n, 'created_date': pd.date_range('2024-01-01', periods=n, freq='h')})
+
+
+def test_evicted_frame_is_freed():
+    evicted = []
+    store = DatasetStore(rss_budget=0, on_evict=evicted.append, rss=lambda: len(store.frames))
+    store.hold('session', 'a')
+    df = store.get_or_load('a', _frame)
+    features_for(df)['hour']
+    ref = weakref.ref(df)
+    assert 'a' in store
+
+    del df
+    store.release('session')
+    store.enforce_budget()
+    gc.collect()
+
+    assert evicted == ['a']
+    assert 'a' not in store
+    assert ref() is None
+
+
+def test_held_frames_are_kept():
+    store = DatasetStore(rss_budget=0, rss=lambda: len(store.frames))
+    store.hold('session', 'a')
+    store.get_or_load('a', _frame)
+    store.enforce_budget()
+    assert 'a' in store
+
+
+def test_memory_usage_reports_cached_features():
+    store = DatasetStore()
+    df = store.get_or_load('a', _frame)
+    hours = features_for(df)['hour']
+    usage = store.memory_usage().set_index('dataset')
+    assert usage.loc['a', 'rows'] == len(df)
+    assert usage.loc['a', 'derived_bytes'] == int(hours.memory_usage(deep=True))
@@ -0,0 +1,60 @@
+import gc
+import weakref
+import pandas as pd
+from modules.derived_columns import DerivedColumns, _registries, features_for, mark_changed
+
+
+def _frame(n=50):
+    return pd.DataFrame({
+        'title': [f"post {i}" for i in range(n)],
+        'selftext': ['body'] * n,
+        'created_date': pd.date_range('2024-01-01', periods=n, freq='h')
+    })
+
+
+def test_dropped_frame_is_collected():
+    df = _frame()
+    features = features_for(df)
+    features['hour']
+    features['combined_text']
+    ref = weakref.ref(df)
+    key = id(df)
+
+    del df
+    gc.collect()
+
+    assert ref() is None
+    assert key not in _registries
+
+
+def test_features_are_cached_with_sizes():
+    df = _frame()
+    features = features_for(df)
+    first = features['day_of_week']
+    assert features['day_of_week'] is first
+    assert features_for(df) is features
+    assert features.sizes['day_of_week'] == int(first.memory_usage(deep=True))
+
+
+def test_in_place_edit_invalidates_features():
+    df = _frame()
+    features = features_for(df)
+    assert features['combined_text'].iloc[0] == 'post 0 body'
+
+    df.loc[0, 'title'] = 'edited'
+    mark_changed(df)
+    assert features['combined_text'].iloc[0] == 'edited body'
+    assert len(df) == 50
+
+
+def test_feature_computed_across_a_change_is_not_cached(monkeypatch):
+    def edit_while_computing(features):
+        result = features.df['title'].str.len()
+        mark_changed(features.df)
+        return result
+
+    monkeypatch.setitem(DerivedColumns.FEATURES, 'title_length', edit_while_computing)
+    df = _frame()
+    features = features_for(df)
+    features['title_length']
+    assert 'title_length' not in features.cached()
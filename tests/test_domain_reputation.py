@@ -0,0 +1,16 @@
+from modules.domain_reputation import PublicSuffixList, DomainReputationIndex, TRUSTED, UNTRUSTED
+
+
+def test_bundled_suffix_list_resolves_registered_domains():
+    suffixes = PublicSuffixList.from_file()
+    assert suffixes.registered_domain('www.bbc.co.uk') == 'bbc.co.uk'
+    assert suffixes.registered_domain('news.harvard.edu') == 'harvard.edu'
+    assert suffixes.registered_domain('foo.blogspot.com') == 'foo.blogspot.com'
+
+
+def test_lookup_walks_parent_labels():
+    index = DomainReputationIndex(['edu', 'bbc.co.uk'], ['rumble.com'], PublicSuffixList.from_file())
+    assert index.lookup('www.bbc.co.uk') == ('bbc.co.uk', TRUSTED)
+    assert index.lookup('news.harvard.edu') == ('harvard.edu', TRUSTED)
+    assert index.lookup('rumble.com.evil.io') == ('evil.io', 0)
+    assert index.lookup('video.rumble.com') == ('rumble.com', UNTRUSTED)
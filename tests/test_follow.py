@@ -0,0 +1,80 @@
+import sys
+import threading
+from modules.data_ingestion import DataIngestionAgent
+from conftest import make_post, write_posts
+
+
+def test_appends_are_read_once(posts_file):
+    write_posts(posts_file, [make_post(i) for i in range(10)])
+    agent = DataIngestionAgent(posts_file, follow=True, workers=1)
+    notified = []
+    agent.add_listener(lambda df, new_rows: notified.append(len(new_rows)))
+
+    write_posts(posts_file, [make_post(i) for i in range(10, 15)])
+    assert agent.read_new_rows() == 5
+    assert agent.read_new_rows() == 0
+    assert len(agent.get_dataframe()) == 15
+    assert notified == [5]
+
+
+def test_appends_leave_the_previous_frame_untouched(posts_file):
+    write_posts(posts_file, [make_post(i) for i in range(5)])
+    agent = DataIngestionAgent(posts_file, follow=True, workers=1)
+    old_df = agent.get_dataframe()
+    old_categories = list(old_df['subreddit'].cat.categories)
+
+    write_posts(posts_file, [make_post(5, subreddit='other')])
+    agent.read_new_rows()
+    assert list(old_df['subreddit'].cat.categories) == old_categories
+    assert agent.get_dataframe()['subreddit'].iloc[-1] == 'other'
+
+
+def test_newer_copy_replaces_existing_post(posts_file):
+    write_posts(posts_file, [make_post(i) for i in range(5)])
+    agent = DataIngestionAgent(posts_file, follow=True, dedup='exact', workers=1)
+
+    write_posts(posts_file, [make_post(2, retrieved_on=500, score=99), make_post(3, retrieved_on=50, score=-1)])
+    agent.read_new_rows()
+    df = agent.get_dataframe()
+    scores = dict(zip(df['name'], df['score']))
+    assert len(df) == 5
+    assert scores['t3_p2'] == 99
+    assert scores['t3_p3'] == 1
+    assert agent.duplicates_dropped == 2
+
+
+def test_concurrent_polls_do_not_duplicate_rows(posts_file):
+    write_posts(posts_file, [make_post(0)])
+    agent = DataIngestionAgent(posts_file, follow=True, dedup='off', workers=1)
+    done = threading.Event()
+    errors = []
+
+    def append():
+        for batch in range(100):
+            write_posts(posts_file, [make_post(1 + batch * 10 + i) for i in range(10)])
+        done.set()
+
+    def poll():
+        try:
+            while not done.is_set():
+                agent.read_new_rows()
+            agent.read_new_rows()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=append)] + [threading.Thread(target=poll) for _ in range(8)]
+    # Switch threads often so unsynchronised reads would interleave.
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+    df = agent.get_dataframe()
+    assert not errors
+    assert len(df) == 1001
+    assert df['name'].is_unique
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+from modules.score_cache import ScoreCache
+
+
+def _store(cache, hashes, ruleset):
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    details = pd.DataFrame({'row': np.arange(len(hashes), dtype=np.int64),
+                            'factor': np.zeros(len(hashes), dtype=np.int8),
+                            'detail': np.array(['x'] * len(hashes), dtype=object)})
+    cache.store(hashes, ruleset, np.ones(len(hashes), dtype=np.int8), np.ones(len(hashes), dtype=np.int32), details)
+
+
+def _found(cache, hashes, ruleset):
+    found, _, _, details = cache.lookup(np.asarray(hashes, dtype=np.uint64), ruleset)
+    return found.tolist(), details['row'].tolist()
+
+
+def test_new_ruleset_drops_previous_rulesets(tmp_path):
+    cache = ScoreCache(str(tmp_path / 'scores.sqlite'))
+    _store(cache, [1, 2], 'old')
+    _store(cache, [3], 'new')
+    assert _found(cache, [1, 2], 'old') == ([False, False], [])
+    assert _found(cache, [3], 'new') == ([True], [0])
+
+
+def test_oldest_rows_are_evicted_past_the_limit(tmp_path):
+    cache = ScoreCache(str(tmp_path / 'scores.sqlite'), max_rows=3)
+    _store(cache, [1], 'rules')
+    _store(cache, [2, 3], 'rules')
+    _store(cache, [4], 'rules')
+    assert _found(cache, [1, 2, 3, 4], 'rules') == ([False, True, True, True], [1, 2, 3])
@@ -9,9 +9,46 @@ TAB_INDICES = {
     "ai_insights": 5
 }
 
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda func: func)
+
+TAB_LABELS = {
+    "overview": "📈 Overview & Stats",
+    "time_series": "⏱️ Time Series Analysis",
+    "text_analysis": "🔤 Text Analysis",
+    "advanced_topics": "🔍 Advanced Topics",
+    "credibility": "🛡️ Credibility Analysis",
+    "ai_insights": "🤖 AI Insights"
+}
+
+def render_tab_selector():
+    tab_ids = sorted(TAB_INDICES, key=TAB_INDICES.get)
+    selected = st.radio(
+        "View",
+        tab_ids,
+        format_func=TAB_LABELS.get,
+        horizontal=True,
+        label_visibility="collapsed",
+        key="active_view"
+    )
+    st.session_state.active_tab = TAB_INDICES[selected]
+    return selected
+
+def wait_for_analyses(scheduler, names):
+    pending = scheduler.pending(names)
+    if not pending:
+        return
+    placeholder = st.empty()
+    with placeholder.container():
+        progress = st.progress(0.0, text=f"Running background analyses: {', '.join(pending)}")
+        for done, name in enumerate(scheduler.as_completed(pending), start=1):
+            remaining = [other for other in pending if not scheduler.ready(other)]
+            progress.progress(done / len(pending), text=f"Finished {name}. Waiting for: {', '.join(remaining) or 'rendering'}")
+    placeholder.empty()
+
 def switch_tab(tab_name):
     if tab_name in TAB_INDICES:
         st.session_state.active_tab = TAB_INDICES[tab_name]
+        st.session_state.active_view = tab_name
 
 def create_tab_links():
     tabs = [
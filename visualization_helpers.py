@@ -1,7 +1,6 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 from typing import Dict, List, Any, Optional, Tuple
 
 def generate_time_series_insight(time_data: pd.DataFrame, time_agg: str) -> Tuple[str, Dict[str, Any]]: